@@ -1,7 +1,11 @@
 import streamlit as st
-from hragent_app import run_agent_workflow
 import json  
+import uuid
 from jd_template_selector import get_template_for_role
+from jd_templates import JD_TEMPLATES
+from session_store import get_session_store
+from email_templates import EMAIL_TEMPLATES
+from mail_merge import get_template
 
 st.title("🧠 Agentic Hiring Plan Generator")
 option = st.sidebar.radio("Choose an action:", ["Generate Hiring Plan", "Show JD Templates", "Show Email Templates"])
@@ -14,8 +18,122 @@ roles_master = [
     "HR Manager", "Software Engineering Intern", "Product Intern", "Marketing Intern", "Operations Intern",
     "GenAI Intern"
 ]
+# large plans are paged, so a rerun draws at most this many roles
+ROLES_PER_PAGE = 10
+
+# Streamlit re-runs this script on every interaction. Anything costly to build is
+# created once per server process below and shared by all sessions.
+@st.cache_resource(show_spinner="Loading the hiring workflow...")
+def load_workflow():
+    # imported on first use, so the template pages never load LangGraph
+    import hragent_app
+    hragent_app.get_app(hragent_app.COMBINED_GENERATION)
+    return hragent_app
+
+@st.cache_resource
+def load_templates() -> dict:
+    # JD template store (warmed, with its title matcher) and the compiled email templates
+    get_template_for_role(roles_master[0])
+    return {"jd": JD_TEMPLATES, "email": {name: get_template(name) for name in EMAIL_TEMPLATES}}
+
+# widgets inside a fragment rerun only that function, not the whole page
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", lambda f: f)
+
+def checklist_progress(checklist_state: dict, roles: list) -> dict:
+    # ticked checklist indices per role, as kept in the session store
+    progress = {role: [] for role in roles}
+    for key, done in checklist_state.items():
+        role, _, idx = key.rpartition("_check_")
+        if done and role in progress:
+            progress[role].append(int(idx))
+    return {role: sorted(checked) for role, checked in progress.items()}
+
+def page_of(roles: list) -> list:
+    if len(roles) <= ROLES_PER_PAGE:
+        return roles
+    pages = -(-len(roles) // ROLES_PER_PAGE)
+    page = st.number_input(f"Page (of {pages}, {ROLES_PER_PAGE} roles each)", min_value=1, max_value=pages, step=1, key="page")
+    start = (page - 1) * ROLES_PER_PAGE
+    return roles[start:start + ROLES_PER_PAGE]
+
+@fragment
+def clarify_role(role: str, clarifications: dict, expanded: bool):
+    # editing one role's answers reruns only this form
+    saved = clarifications.get(role, {})
+    with st.expander(f"{role} Clarification", expanded=expanded):
+        summary = st.text_input(f"{role} - 1-line summary", key=f"{role}_summary", value=saved.get("summary", ""))
+        budget = st.text_input(f"{role} - Compensation budget?", key=f"{role}_budget", value=saved.get("budget", ""))
+        equity = st.selectbox(f"{role} - Equity or tokens?", ["Yes", "No"], key=f"{role}_equity", index=0 if saved.get("equity") != "No" else 1)
+        perks = st.text_input(f"{role} - Benefits/perks?", key=f"{role}_perks", value=saved.get("perks", ""))
+        timeline = st.text_input(f"{role} - Target hiring timeline", key=f"{role}_timeline", value=saved.get("timeline", ""))
+        deadline = st.text_input(f"{role} - Hard deadline?", key=f"{role}_deadline", value=saved.get("deadline", ""))
+        setup = st.selectbox(f"{role} - Work setup", ["Remote", "Hybrid", "Onsite"], key=f"{role}_setup", index=["Remote", "Hybrid", "Onsite"].index(saved.get("work_setup", "Remote")))
+        location = st.text_input(f"{role} - Location (if not remote)?", key=f"{role}_location", value=saved.get("location", ""))
+        must = st.text_input(f"{role} - Must-have skills", key=f"{role}_must", value=saved.get("must_have_skills", ""))
+        nice = st.text_input(f"{role} - Nice-to-have skills", key=f"{role}_nice", value=saved.get("nice_to_have_skills", ""))
+        domain = st.text_input(f"{role} - Domain experience", key=f"{role}_domain", value=saved.get("domain_experience", ""))
+        years = st.text_input(f"{role} - Years of experience", key=f"{role}_years", value=saved.get("years_experience", ""))
+        responsibilities = st.text_area(f"{role} - Key responsibilities", key=f"{role}_resp", value=saved.get("key_responsibilities", ""))
+        impact = st.text_area(f"{role} - Top 6–12 month outcomes", key=f"{role}_impact", value=saved.get("impact_6months", ""))
+
+        # save the values back to session_state
+        clarifications[role] = {
+            "summary": summary,
+            "budget": budget,
+            "equity": equity,
+            "perks": perks,
+            "timeline": timeline,
+            "deadline": deadline,
+            "work_setup": setup,
+            "location": location,
+            "must_have_skills": must,
+            "nice_to_have_skills": nice,
+            "domain_experience": domain,
+            "years_experience": years,
+            "key_responsibilities": responsibilities,
+            "impact_6months": impact
+        }
+
+@fragment
+def role_checklist(role: str, items: list, session_id: str):
+    # ticking an item reruns only this role's checklist
+    checklist_state = st.session_state["checklist_state"]
+    completed = 0
+    for idx, item in enumerate(items):
+        key = f"{role}_check_{idx}"
+        checklist_state[key] = st.checkbox(item, key=key, value=checklist_state.get(key, False))
+        if checklist_state[key]:
+            completed += 1
+
+    # only this role's progress row is written, and only when it changed
+    checked = checklist_progress(checklist_state, [role])[role]
+    saved = st.session_state.setdefault("saved_progress", {})
+    if checked != saved.get(role, []):
+        get_session_store().save_progress(session_id, role, checked)
+        saved[role] = checked
+
+    st.markdown(f"**Progress: {completed} of {len(items)} tasks completed**")
+    st.progress(completed / len(items) if items else 0.0)
 
 if option == "Generate Hiring Plan":
+    workflow = load_workflow()
+    store = get_session_store()
+
+    # one saved session per browser tab; its ID sits in the URL so a reload restores it
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = st.query_params.get("session") or uuid.uuid4().hex
+        st.query_params["session"] = st.session_state.session_id
+        saved = store.load(st.session_state.session_id)
+        if saved and saved.get("fingerprints"):
+            st.session_state.roles = saved["roles"]
+            st.session_state.roles_entered = True
+            st.session_state["clarifications"] = saved.get("clarifications", {})
+            st.session_state["result"] = saved  # JDs are read from the store when first shown
+            st.session_state["saved_progress"] = saved.get("progress", {})
+            st.session_state["checklist_state"] = {
+                f"{role}_check_{idx}": True for role, checked in st.session_state["saved_progress"].items() for idx in checked
+            }
+    session_id = st.session_state.session_id
 
     if "roles_entered" not in st.session_state:
         st.session_state.roles_entered = False
@@ -37,44 +155,13 @@ if option == "Generate Hiring Plan":
         clarifications = st.session_state["clarifications"]  # work directly with session state
 
         st.markdown("---")
+        saved_company = (st.session_state.get("result") or {}).get("company")
+        company = st.text_input("Company name (used in candidate emails)", key="company", value=saved_company or workflow.COMPANY_NAME)
+        page_roles = page_of(roles)
         st.subheader("🔍 Clarify Hiring Needs")
 
-        for role in roles:
-            # get stored values 
-            saved = clarifications.get(role, {})
-            with st.expander(f"{role} Clarification", expanded=True):
-                summary = st.text_input(f"{role} - 1-line summary", key=f"{role}_summary", value=saved.get("summary", ""))
-                budget = st.text_input(f"{role} - Compensation budget?", key=f"{role}_budget", value=saved.get("budget", ""))
-                equity = st.selectbox(f"{role} - Equity or tokens?", ["Yes", "No"], key=f"{role}_equity", index=0 if saved.get("equity") != "No" else 1)
-                perks = st.text_input(f"{role} - Benefits/perks?", key=f"{role}_perks", value=saved.get("perks", ""))
-                timeline = st.text_input(f"{role} - Target hiring timeline", key=f"{role}_timeline", value=saved.get("timeline", ""))
-                deadline = st.text_input(f"{role} - Hard deadline?", key=f"{role}_deadline", value=saved.get("deadline", ""))
-                setup = st.selectbox(f"{role} - Work setup", ["Remote", "Hybrid", "Onsite"], key=f"{role}_setup", index=["Remote", "Hybrid", "Onsite"].index(saved.get("work_setup", "Remote")))
-                location = st.text_input(f"{role} - Location (if not remote)?", key=f"{role}_location", value=saved.get("location", ""))
-                must = st.text_input(f"{role} - Must-have skills", key=f"{role}_must", value=saved.get("must_have_skills", ""))
-                nice = st.text_input(f"{role} - Nice-to-have skills", key=f"{role}_nice", value=saved.get("nice_to_have_skills", ""))
-                domain = st.text_input(f"{role} - Domain experience", key=f"{role}_domain", value=saved.get("domain_experience", ""))
-                years = st.text_input(f"{role} - Years of experience", key=f"{role}_years", value=saved.get("years_experience", ""))
-                responsibilities = st.text_area(f"{role} - Key responsibilities", key=f"{role}_resp", value=saved.get("key_responsibilities", ""))
-                impact = st.text_area(f"{role} - Top 6–12 month outcomes", key=f"{role}_impact", value=saved.get("impact_6months", ""))
-
-                # save the values back to session_state
-                clarifications[role] = {
-                    "summary": summary,
-                    "budget": budget,
-                    "equity": equity,
-                    "perks": perks,
-                    "timeline": timeline,
-                    "deadline": deadline,
-                    "work_setup": setup,
-                    "location": location,
-                    "must_have_skills": must,
-                    "nice_to_have_skills": nice,
-                    "domain_experience": domain,
-                    "years_experience": years,
-                    "key_responsibilities": responsibilities,
-                    "impact_6months": impact
-                }
+        for role in page_roles:
+            clarify_role(role, clarifications, expanded=len(roles) <= 3)
 
         # offer download of current session state
         if st.session_state.get("clarifications") and st.session_state.get("roles"):
@@ -85,38 +172,58 @@ if option == "Generate Hiring Plan":
             st.download_button("💾 Download Session as JSON", data=session_json, file_name="session_state.json")
 
         if st.button("🚀 Generate Hiring Plan"):
-            with st.spinner("Generating..."):
-                result = run_agent_workflow(roles, clarifications)
+            # stream each role's JD into its own section as the tokens arrive
+            # (only for the roles on this page; the rest are counted)
+            live = st.empty()
+            with live.container():
+                st.info("Generating... job descriptions appear below as they are written.")
+                counter = st.empty()
+                sections, drafts = {}, {}
+                for role in page_roles:
+                    st.subheader(f"📄 {role}")
+                    sections[role] = st.empty()
+
+            result = None
+            written = 0
+            # only new or edited roles are sent to the LLM again
+            for event in workflow.stream_agent_workflow(roles, clarifications, previous=st.session_state.get("result"), company=company):
+                if event["type"] == "jd_delta" and event["role"] in sections:
+                    drafts[event["role"]] = drafts.get(event["role"], "") + event["text"]
+                    sections[event["role"]].markdown(drafts[event["role"]] + " ▌")
+                elif event["type"] == "jd_done":
+                    written += 1
+                    counter.caption(f"{written} job description(s) written")
+                    if event["role"] in sections:
+                        sections[event["role"]].markdown(drafts.get(event["role"], ""))
+                elif event["type"] == "result":
+                    result = event["state"]
+            live.empty()
+
+            if result is not None:
                 st.session_state["result"] = result  # store result persistently
-                st.session_state["checklist_state"] = {}  # initialize checklist states
-
-            st.success("✅ Done!")
+                # keep checklist progress for roles whose checklist was reused
+                recomputed = set(result.get("recomputed_roles", roles))
+                st.session_state["checklist_state"] = {
+                    key: value for key, value in st.session_state.get("checklist_state", {}).items()
+                    if key.rsplit("_check_", 1)[0] not in recomputed
+                }
+                st.session_state["saved_progress"] = checklist_progress(st.session_state["checklist_state"], roles)
+                store.save(session_id, {**result, "progress": st.session_state["saved_progress"]})
+                st.success(f"✅ Done! Regenerated {len(recomputed)} of {len(roles)} role(s).")
 
         if "result" in st.session_state:
             result = st.session_state["result"]
+            st.session_state.setdefault("checklist_state", {})
 
-            for role in roles:
+            for role in page_roles:
                 st.subheader(f"📄 {role}")
-                st.markdown("**Job Description:**")
-                st.markdown(result["job_descriptions"][role])
+                for error in result.get("errors", {}).get(role, []):
+                    st.error(f"Generation failed — {error}")
+                with st.expander("**Job Description**", expanded=len(roles) <= 3):
+                    st.markdown(result["job_descriptions"].get(role, "_Not available._"))
 
                 st.markdown("**Checklist:**")
-                checklist_items = result["checklists"][role]
-                completed = 0
-                total = len(checklist_items)
-
-                for idx, item in enumerate(checklist_items):
-                    key = f"{role}_check_{idx}"
-                    if key not in st.session_state["checklist_state"]:
-                        st.session_state["checklist_state"][key] = False
-                    st.session_state["checklist_state"][key] = st.checkbox(
-                        item, key=key, value=st.session_state["checklist_state"][key]
-                    )
-                    if st.session_state["checklist_state"][key]:
-                        completed += 1
-
-                st.markdown(f"**Progress: {completed} of {total} tasks completed**")
-                st.progress(completed / total)
+                role_checklist(role, result["checklists"].get(role, []), session_id)
 
         if st.session_state.get("result") and "markdown_output" in st.session_state["result"]:
             st.download_button(
@@ -126,13 +233,16 @@ if option == "Generate Hiring Plan":
             )
 
         if st.button("🔁 Start Over"):
+            store.delete(session_id)
             st.session_state.clear()
+            st.query_params.clear()
             st.rerun()
 
 elif option == "Show JD Templates":
     st.subheader("📚 Browse JD Templates")
     selected_role = st.selectbox("Choose a role", ["-Select-"] + roles_master)
     if selected_role != "-Select-":
+        load_templates()
         template = get_template_for_role(selected_role)
         st.markdown(f"### {selected_role} JD Template")
         st.markdown(template)
@@ -140,111 +250,15 @@ elif option == "Show JD Templates":
 elif option == "Show Email Templates":
     st.subheader("📬 Browse Email Templates")
 
-    # email templates
-    email_templates = {
-        "Interview Invitation": """Subject: Interview Invitation - [Role] Position at [Company]
-
-                                Dear [Candidate Name],
-
-                                Thank you for your application for the [Role] position at [Company]. We have reviewed your qualifications and would like to invite you for an interview.
-
-                                Interview Details:
-                                - Duration: 45-60 minutes
-                                - Format: [Video call via Zoom/Google Meet]
-                                - Interviewer: [Interviewer Name, Title]
-                                - Focus Areas: Role requirements, your experience, and organizational fit
-
-                                Please reply with your availability for the coming week, and we will send you a calendar invitation with the meeting details.
-
-                                Thank you for your interest in [Company].
-
-                                Best regards,  
-                                [Your Name]  
-                                [Title]  
-                                [Company]
-                                """,
-        "Application Rejection": """Subject: Application Status - [Role] Position at [Company]
-
-                                Dear [Candidate Name],
-
-                                Thank you for your interest in the [Role] position at [Company] and for taking the time to submit your application.
-
-                                After careful consideration, we have decided to proceed with other candidates whose qualifications more closely match our current requirements. This decision does not reflect negatively on your professional background and experience.
-
-                                We encourage you to apply for future opportunities that align with your skills and career objectives. Please feel free to visit our careers page for updates on available positions.
-
-                                We appreciate your interest in [Company] and wish you success in your career endeavors.
-
-                                Sincerely,  
-                                [Your Name]  
-                                [Title]  
-                                [Company]
-                                """,
-        "Technical Assessment Invitation": """Subject: Technical Assessment - [Role] Position at [Company]
-
-                                Dear [Candidate Name],
-
-                                Following our initial interview, we would like to invite you to complete a technical assessment as the next step in our selection process for the [Role] position.
-
-                                Assessment Details:
-                                - Type: [Coding challenge/Take-home project]
-                                - Estimated Duration: [90 minutes]
-                                - Submission Deadline: [Date and time]
-                                - Platform: [Assessment platform/delivery method]
-
-                                Please confirm your participation and let us know if you require any accommodations or have questions regarding the assessment.
-
-                                The assessment link and instructions will be provided upon confirmation.
-
-                                Best regards,  
-                                [Your Name]  
-                                [Title]  
-                                [Company]
-                                """,
-        "Post-Interview Follow-up": """Subject: Interview Follow-up - [Role] Position at [Company]
-
-                                Dear [Candidate Name],
-
-                                Thank you for taking the time to interview for the [Role] position at [Company]. We appreciate your interest in joining our organization.
-
-                                Our team is currently reviewing all candidate interviews and will provide you with an update on the next steps within [timeframe, e.g., 3-5 business days].
-
-                                If you have any questions in the meantime, please do not hesitate to contact me.
-
-                                Thank you again for your time and consideration.
-
-                                Best regards,  
-                                [Your Name]  
-                                [Title]  
-                                [Company]
-                                """,
-        "Job Offer": """Subject: Job Offer - [Role] Position at [Company]
-
-                                Dear [Candidate Name],
-
-                                We are pleased to extend an offer of employment for the position of [Role] at [Company].
-
-                                Offer Summary:
-                                - Position: [Role]
-                                - Compensation: [Salary and benefits package]
-                                - Work Location: [Office location/Remote/Hybrid]
-                                - Start Date: [Proposed start date]
-
-                                A formal offer letter with complete terms and conditions will be sent via [delivery method] for your review and signature.
-
-                                Please confirm receipt of this offer and advise us of your decision by [deadline date]. Should you have any questions regarding the terms of employment, please contact me directly.
-
-                                We look forward to your positive response and to welcoming you to our team.
-
-                                Sincerely,  
-                                [Your Name]  
-                                [Title]  
-                                [Company]
-                                """
-    }
-
     # template dropdown
-    selected_template = st.selectbox("Choose an Email Template", ["-Select-"] + list(email_templates.keys()))
+    titles = {spec["title"]: name for name, spec in EMAIL_TEMPLATES.items()}
+    selected_template = st.selectbox("Choose an Email Template", ["-Select-"] + list(titles))
     if selected_template != "-Select-":
+        template = load_templates()["email"][titles[selected_template]]
         st.markdown(f"### 📄 {selected_template}")
-        st.text_area("Preview", email_templates[selected_template], height=400, disabled=True)
\ No newline at end of file
+        st.text_area("Preview", f"Subject: {template.subject.source}\n\n{template.body.source}", height=400, disabled=True)
+        st.caption(
+            "Placeholders: " + ", ".join(f"`{{{slot}}}`" for slot in sorted(template.slots))
+            + ". Send to a candidate list with `python mail_merge.py candidates.csv -t "
+            + f"{template.name} --set role=... -o emails.jsonl`."
+        )
\ No newline at end of file
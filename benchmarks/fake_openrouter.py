@@ -0,0 +1,187 @@
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# A local stand-in for OpenRouter's /chat/completions endpoint, for offline benchmarks.
+#
+# Latency is drawn per request from a distribution spec:
+#   fixed:0.2            always 200 ms
+#   uniform:0.05,0.4     uniform between 50 and 400 ms
+#   normal:0.2,0.05      mean 200 ms, sd 50 ms (clipped at 0)
+#   lognormal:0.2,0.6    median 200 ms, sigma 0.6 (long right tail, like real LLM APIs)
+#   exp:0.2              exponential with mean 200 ms
+# A fraction of requests can fail with 500 (--error-rate) or 429 + Retry-After
+# (--rate-429). Streaming requests ("stream": true) are answered as server-sent events.
+
+CHECKLIST = [
+    "Draft the JD with clear 6-month outcomes",
+    "Post the role on LinkedIn and niche job boards",
+    "Screen CVs against the must-have skills",
+    "Run a 30-minute recruiter screen",
+    "Send a HackerRank take-home assessment",
+    "Schedule a 60-minute technical interview",
+    "Hold a culture and values conversation",
+    "Check references from two recent managers",
+    "Prepare and send the offer",
+    "Plan the first-week onboarding",
+]
+
+
+def parse_latency(spec: str):
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1 / values[0])
+    raise ValueError(f"unknown latency distribution '{spec}'")
+
+
+def completion_text(prompt: str, json_mode: bool) -> str:
+    checklist = "\n".join(f"• {item}" for item in CHECKLIST)
+    jd = ("**About the Job:**\nWe are a fast-growing startup looking for a great teammate.\n\n"
+          "**What You Will Do:**\n- Ship features\n- Own outcomes\n- Work with the team\n- Mentor others")
+    if json_mode:
+        return json.dumps({"jd": jd, "checklist": CHECKLIST})
+    return checklist if "checklist" in prompt.lower() else jd
+
+
+class Server(ThreadingHTTPServer):
+    # a deep accept backlog so hundreds of concurrent clients never wait on SYN retries
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients hang up mid-response all the time (cancelled hedges, closed streams)
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeOpenRouter:
+    """Threaded fake chat-completions server; ``start()`` returns its base URL."""
+
+    def __init__(self, latency: str = "lognormal:0.05,0.5", error_rate: float = 0.0, rate_429: float = 0.0,
+                 retry_after: float = 0.2, stream_chunk_delay: float = 0.002, seed: int = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.stream_chunk_delay = stream_chunk_delay
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.requests = 0
+        self.host, self.port = host, port
+        self.server = None
+
+    def draw(self):
+        with self.rng_lock:
+            self.requests += 1
+            roll = self.rng.random()
+            return self.sample_latency(self.rng), roll
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, headers=()):
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                latency, roll = fake.draw()
+
+                if roll < fake.rate_429:
+                    self._send(429, b'{"error": "rate limited"}', [("Retry-After", str(fake.retry_after))])
+                    return
+                time.sleep(latency)
+                if roll < fake.rate_429 + fake.error_rate:
+                    self._send(500, b'{"error": "upstream error"}')
+                    return
+
+                prompt = request.get("messages", [{}])[-1].get("content", "")
+                json_mode = request.get("response_format", {}).get("type") == "json_object"
+                text = completion_text(prompt, json_mode)
+                usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4}
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                if request.get("stream"):
+                    self.stream(text, request.get("model"))
+                    return
+                body = {"model": request.get("model"), "choices": [{"message": {"role": "assistant", "content": text}}],
+                        "usage": usage}
+                self._send(200, json.dumps(body).encode("utf-8"), [("Content-Type", "application/json")])
+
+            def stream(self, text: str, model: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def chunk(data: bytes):
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+
+                chunk(b": OPENROUTER PROCESSING\n\n")
+                words = text.split(" ")
+                for i, word in enumerate(words):
+                    delta = word if i == len(words) - 1 else word + " "
+                    event = {"model": model, "choices": [{"delta": {"content": delta}}]}
+                    chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    if fake.stream_chunk_delay:
+                        time.sleep(fake.stream_chunk_delay)
+                chunk(b"data: [DONE]\n\n")
+                chunk(b"")
+
+        return Handler
+
+    def start(self) -> str:
+        self.server = Server((self.host, self.port), self.handler())
+        threading.Thread(target=self.server.serve_forever, name="fake-openrouter", daemon=True).start()
+        return f"http://{self.host}:{self.server.server_port}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake OpenRouter chat-completions server.")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--latency", default="lognormal:0.05,0.5", help="latency distribution spec (see module docs)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeOpenRouter(args.latency, args.error_rate, args.rate_429, args.retry_after, seed=args.seed, port=args.port)
+    url = fake.start()
+    print(f"🧪 Fake OpenRouter on {url} — set OPENROUTER_BASE_URL={url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_openrouter import FakeOpenRouter  # noqa: E402
+
+# Drives the real workflow, streaming and batch paths against the local fake server, so
+# the HTTP client, scheduler, router and graph fan-out are all exercised. The response
+# cache is off throughout; every plan makes real (local) requests.
+#
+#   python benchmarks/run_benchmarks.py                      # full grid, print results
+#   python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+#   python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+#   python benchmarks/run_benchmarks.py --imports-only      # cold-start budget check only
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_SIZES = (1, 10, 50, 200)
+DEFAULT_CONCURRENCY = (4, 16, 64)
+DEFAULT_BATCH_PARALLEL = (1, 4, 16)
+
+# module: cold import budget in seconds (best of IMPORT_RUNS fresh interpreters)
+IMPORT_BUDGETS = {"hragent_app": 0.25, "jd_template_selector": 0.05}
+IMPORT_RUNS = 5
+# importing any budgeted module must not load these; they are imported on first use
+LAZY_MODULES = ("langgraph", "httpx")
+
+SAMPLE_INFO = {
+    "summary": "Own our core API and data pipeline",
+    "timeline": "in 6 weeks",
+    "deadline": "Q4",
+    "work_setup": "Hybrid",
+    "location": "Berlin",
+    "must_have_skills": "Python, SQL, distributed systems",
+    "nice_to_have_skills": "LangGraph",
+    "years_experience": "4+",
+    "key_responsibilities": "Design services, review code, mentor engineers",
+    "impact_6months": "Cut p95 API latency in half",
+    "budget": "€90k",
+    "equity": "Y",
+}
+
+# metric: True when higher is better
+COMPARED = {
+    "roles_per_s": True,
+    "plans_per_min": True,
+    "plan_p95_s": False,
+    "call_p99_s": False,
+    "first_delta_p95_s": False,
+    "peak_mem_mb": False,
+    "import_s": False,
+}
+
+
+def percentile(values: list, pct: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return round(ordered[index], 4)
+
+
+def latency_stats(prefix: str, values: list) -> dict:
+    return {f"{prefix}_p{p}_s": percentile(values, p) for p in (50, 95, 99)}
+
+
+def peak_memory(fn) -> float:
+    # Python heap high-water mark of one extra run; kept out of the timed runs because
+    # tracemalloc slows every allocation down
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def sample_plan(size: int) -> tuple:
+    roles = [f"Backend Engineer {i}" for i in range(size)]
+    return roles, {role: dict(SAMPLE_INFO) for role in roles}
+
+# ---- scenarios ----
+
+def import_time(module: str) -> tuple:
+    """Best-of-N cumulative ``-X importtime`` of ``module``, and the lazy modules it loaded."""
+    code = f"import sys, {module}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    best, loaded = None, []
+    for _ in range(IMPORT_RUNS):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                              capture_output=True, text=True, timeout=120)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        for line in proc.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                micros = int(fields[1])
+                best = micros if best is None else min(best, micros)
+        loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return best / 1e6, loaded
+
+
+def bench_imports() -> list:
+    rows = []
+    for module, budget in IMPORT_BUDGETS.items():
+        seconds, loaded = import_time(module)
+        rows.append({
+            "scenario": f"import/{module}",
+            "import_s": round(seconds, 4),
+            "budget_s": budget,
+            "eager_modules": loaded,
+            "over_budget": seconds > budget or bool(loaded),
+        })
+    return rows
+
+
+def bench_workflow(size: int, concurrency: int, repeats: int) -> dict:
+    from hragent_app import run_agent_workflow
+    from llm_client import request_count
+
+    roles, clarifications = sample_plan(size)
+    run = lambda: run_agent_workflow(roles, clarifications, max_concurrency=concurrency, use_cache=False, run_id=None)
+    plan_times, call_times, errors = [], [], 0
+    requests_before = request_count()
+    for _ in range(repeats):
+        started = time.perf_counter()
+        state = run()
+        plan_times.append(time.perf_counter() - started)
+        call_times += [row["latency_s"] for row in state.get("routing", []) if "latency_s" in row]
+        errors += len(state.get("errors", {}))
+    elapsed = sum(plan_times)
+    return {
+        "scenario": f"workflow/roles={size}/concurrency={concurrency}",
+        "plans": repeats,
+        "roles_per_s": round(size * repeats / elapsed, 2),
+        "llm_requests_per_s": round((request_count() - requests_before) / elapsed, 2),
+        **latency_stats("plan", plan_times),
+        **latency_stats("call", call_times),
+        "failed_roles": errors,
+        "peak_mem_mb": peak_memory(run),
+    }
+
+
+def bench_stream(size: int, concurrency: int, repeats: int) -> dict:
+    from hragent_app import stream_agent_workflow
+
+    roles, clarifications = sample_plan(size)
+    plan_times, first_deltas = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        seen = set()
+        for event in stream_agent_workflow(roles, clarifications, max_concurrency=concurrency,
+                                           use_cache=False, run_id=None):
+            if event["type"] == "jd_delta" and event["role"] not in seen:
+                seen.add(event["role"])
+                first_deltas.append(time.perf_counter() - started)
+        plan_times.append(time.perf_counter() - started)
+    return {
+        "scenario": f"stream/roles={size}/concurrency={concurrency}",
+        "plans": repeats,
+        "roles_per_s": round(size * repeats / sum(plan_times), 2),
+        **latency_stats("plan", plan_times),
+        **latency_stats("first_delta", first_deltas),
+    }
+
+
+def bench_batch(plans: int, roles_per_plan: int, parallel: int, concurrency: int) -> dict:
+    from hragent_batch import run_batch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "plans.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            for i in range(plans):
+                roles, clarifications = sample_plan(roles_per_plan)
+                f.write(json.dumps({"id": f"plan-{i}", "roles": roles, "clarifications": clarifications}) + "\n")
+        run = lambda out: asyncio.run(run_batch(source, os.path.join(tmp, out), parallel=parallel,
+                                                max_concurrency=concurrency, use_cache=False))
+        report = run("timed.jsonl")
+        return {
+            "scenario": f"batch/plans={plans}x{roles_per_plan}/parallel={parallel}",
+            "plans": plans,
+            "plans_per_min": report["plans_per_min"],
+            "roles_per_s": round(plans * roles_per_plan / report["elapsed_s"], 2),
+            "llm_requests_per_s": report["llm_requests_per_s"],
+            "failed_roles": report["partial"] + report["failed"],
+            "peak_mem_mb": peak_memory(lambda: run("memory.jsonl")),
+        }
+
+# ---- baseline comparison ----
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Regressions beyond ``tolerance`` (a fraction) against a saved baseline."""
+    previous = {row["scenario"]: row for row in baseline.get("results", [])}
+    regressions = []
+    for row in results:
+        base = previous.get(row["scenario"])
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            new, old = row.get(metric), base.get(metric)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            worse = change < -tolerance if higher_is_better else change > tolerance
+            marker = "❌" if worse else "  "
+            print(f"{marker} {row['scenario']:<45} {metric:<18} {old:>10} -> {new:<10} ({change:+.0%})")
+            if worse:
+                regressions.append((row["scenario"], metric, old, new))
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks against a fake OpenRouter.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="roles per plan")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY,
+                        help="max_concurrency values for the workflow scenarios")
+    parser.add_argument("--repeats", type=int, default=3, help="timed plans per workflow scenario")
+    parser.add_argument("--batch-plans", type=int, default=40, help="plans in the batch scenarios (0 skips them)")
+    parser.add_argument("--batch-parallel", type=int, nargs="+", default=DEFAULT_BATCH_PARALLEL)
+    parser.add_argument("--latency", default="lognormal:0.05,0.5", help="fake server latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--server", metavar="URL",
+                        help="use an already running fake server (the in-process one shares the GIL with the client)")
+    parser.add_argument("--save", metavar="PATH", help="write results as a new baseline")
+    parser.add_argument("--compare", metavar="PATH", nargs="?", const=BASELINE_PATH,
+                        help=f"compare against a baseline (default {os.path.relpath(BASELINE_PATH, ROOT)})")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--imports-only", action="store_true", help="only run the import-time budget check")
+    args = parser.parse_args(argv)
+
+    # first, before this process imports anything from the app
+    results = bench_imports()
+    for row in results:
+        print(json.dumps(row), file=sys.stderr)
+
+    fake, compile_s = None, None
+    if not args.imports_only:
+        fake = None if args.server else FakeOpenRouter(args.latency, args.error_rate, args.rate_429)
+        checkpoint_dir = tempfile.mkdtemp(prefix="hragent-bench-")
+        os.environ.update({
+            "OPENROUTER_BASE_URL": args.server or fake.start(),
+            "OPENROUTER_API_KEY": "benchmark",
+            "LLM_CACHE": "off",
+            "CHECKPOINT_PATH": os.path.join(checkpoint_dir, "checkpoints.sqlite"),
+            "SESSION_PATH": os.path.join(checkpoint_dir, "sessions.sqlite"),
+        })
+
+        # the graph is compiled on first use; do it here so it is timed on its own
+        from hragent_app import COMBINED_GENERATION, get_app
+        started = time.perf_counter()
+        get_app(COMBINED_GENERATION)
+        compile_s = round(time.perf_counter() - started, 3)
+
+        for size in args.sizes:
+            for concurrency in args.concurrency:
+                results.append(bench_workflow(size, concurrency, args.repeats))
+                print(json.dumps(results[-1]), file=sys.stderr)
+        stream_size = min(10, max(args.sizes))
+        results.append(bench_stream(stream_size, max(args.concurrency), args.repeats))
+        print(json.dumps(results[-1]), file=sys.stderr)
+        if args.batch_plans:
+            for parallel in args.batch_parallel:
+                results.append(bench_batch(args.batch_plans, 5, parallel, min(args.concurrency)))
+                print(json.dumps(results[-1]), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "server": None if args.imports_only else args.server or "in-process",
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "rate_429": args.rate_429,
+            "repeats": args.repeats,
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "graph_compile_s": compile_s,
+        },
+        "results": results,
+    }
+    if fake is not None:
+        fake.stop()
+
+    status = 0
+    for row in results:
+        if row.get("over_budget"):
+            eager = f", loads {', '.join(row['eager_modules'])} eagerly" if row["eager_modules"] else ""
+            print(f"❌ {row['scenario']}: {row['import_s']}s (budget {row['budget_s']}s){eager}", file=sys.stderr)
+            status = 1
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        status = 1 if regressions else status
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
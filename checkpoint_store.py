@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_CHECKPOINT_PATH = ".hragent_checkpoints.sqlite"
+
+
+def plan_signature(roles: list, fingerprints: dict, context=None) -> str:
+    # ``context``: plan-wide inputs outside the role fingerprints (e.g. the company name)
+    payload = json.dumps([[role, fingerprints.get(role)] for role in roles] + ([context] if context is not None else []))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """Durable progress of a workflow run, keyed by ``run_id``.
+
+    Two granularities are kept in one SQLite file:
+
+    * role outputs – every per-role LLM result (``kind`` is ``"jd"`` or ``"checklist"``),
+      tagged with the role fingerprint so edited roles are never resumed from stale data;
+    * node outputs – the state update a node returned, tagged with the plan signature
+      (roles + fingerprints) it was computed for.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS role_outputs ("
+            " run_id TEXT NOT NULL, kind TEXT NOT NULL, role TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (run_id, kind, role))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS node_outputs ("
+            " run_id TEXT NOT NULL, node TEXT NOT NULL, signature TEXT NOT NULL,"
+            " value TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (run_id, node))"
+        )
+
+    # ---- per-role results ----
+
+    def save_role(self, run_id: str, kind: str, role: str, fingerprint: str, value):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO role_outputs VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, kind, role, fingerprint, json.dumps(value), time.time()),
+            )
+
+    def load_roles(self, run_id: str, kind: str, fingerprints: dict) -> dict:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT role, fingerprint, value FROM role_outputs WHERE run_id = ? AND kind = ?",
+                (run_id, kind),
+            ).fetchall()
+        return {
+            role: json.loads(value)
+            for role, fingerprint, value in rows
+            if fingerprints.get(role) == fingerprint
+        }
+
+    # ---- per-node results ----
+
+    def save_node(self, run_id: str, node: str, signature: str, update: dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO node_outputs VALUES (?, ?, ?, ?, ?)",
+                (run_id, node, signature, json.dumps(update), time.time()),
+            )
+
+    def load_node(self, run_id: str, node: str, signature: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM node_outputs WHERE run_id = ? AND node = ? AND signature = ?",
+                (run_id, node, signature),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def completed_nodes(self, run_id: str) -> list:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT node FROM node_outputs WHERE run_id = ? ORDER BY created_at", (run_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def clear(self, run_id: str):
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM role_outputs WHERE run_id = ?", (run_id,))
+            self._db.execute("DELETE FROM node_outputs WHERE run_id = ?", (run_id,))
+            self._db.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+# ---- shared instance ----
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CheckpointStore(os.getenv("CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH))
+    return _store
+
+__all__ = ["CheckpointStore", "get_checkpoint_store", "plan_signature"]
@@ -0,0 +1,137 @@
+# Candidate email templates shared by the email_writer node, the mail-merge CLI and
+# the Streamlit template browser.
+#
+# Placeholders are {slot} names (write {{ or }} for a literal brace). {role} and
+# {company} are filled per role by the workflow; {candidate_name} and any other slot
+# without a default must come from the candidate row or --set when merging.
+
+EMAIL_TEMPLATES = {
+    "interview_invite": {
+        "title": "Interview Invitation",
+        "subject": "Interview Invitation - {role} Position at {company}",
+        "body": """\
+Dear {candidate_name},
+
+Thank you for your application for the {role} position at {company}. We have reviewed your qualifications and would like to invite you for an interview.
+
+Interview Details:
+- Duration: {interview_duration}
+- Format: {interview_format}
+- Interviewer: {interviewer}
+- Focus Areas: Role requirements, your experience, and organizational fit
+
+Please reply with your availability for the coming week, and we will send you a calendar invitation with the meeting details.
+
+Thank you for your interest in {company}.
+
+Best regards,
+{sender_name}
+{sender_title}
+{company}
+""",
+        "defaults": {
+            "interview_duration": "45-60 minutes",
+            "interview_format": "Video call via Zoom/Google Meet",
+            "interviewer": "a member of our hiring team",
+        },
+    },
+    "rejection": {
+        "title": "Application Rejection",
+        "subject": "Application Status - {role} Position at {company}",
+        "body": """\
+Dear {candidate_name},
+
+Thank you for your interest in the {role} position at {company} and for taking the time to submit your application.
+
+After careful consideration, we have decided to proceed with other candidates whose qualifications more closely match our current requirements. This decision does not reflect negatively on your professional background and experience.
+
+We encourage you to apply for future opportunities that align with your skills and career objectives. Please feel free to visit our careers page for updates on available positions.
+
+We appreciate your interest in {company} and wish you success in your career endeavors.
+
+Sincerely,
+{sender_name}
+{sender_title}
+{company}
+""",
+    },
+    "technical_assessment": {
+        "title": "Technical Assessment Invitation",
+        "subject": "Technical Assessment - {role} Position at {company}",
+        "body": """\
+Dear {candidate_name},
+
+Following our initial interview, we would like to invite you to complete a technical assessment as the next step in our selection process for the {role} position.
+
+Assessment Details:
+- Type: {assessment_type}
+- Estimated Duration: {assessment_duration}
+- Submission Deadline: {assessment_deadline}
+- Platform: {assessment_platform}
+
+Please confirm your participation and let us know if you require any accommodations or have questions regarding the assessment.
+
+The assessment link and instructions will be provided upon confirmation.
+
+Best regards,
+{sender_name}
+{sender_title}
+{company}
+""",
+        "defaults": {
+            "assessment_type": "Take-home project",
+            "assessment_duration": "90 minutes",
+            "assessment_platform": "HackerRank",
+        },
+    },
+    "interview_follow_up": {
+        "title": "Post-Interview Follow-up",
+        "subject": "Interview Follow-up - {role} Position at {company}",
+        "body": """\
+Dear {candidate_name},
+
+Thank you for taking the time to interview for the {role} position at {company}. We appreciate your interest in joining our organization.
+
+Our team is currently reviewing all candidate interviews and will provide you with an update on the next steps within {response_timeframe}.
+
+If you have any questions in the meantime, please do not hesitate to contact me.
+
+Thank you again for your time and consideration.
+
+Best regards,
+{sender_name}
+{sender_title}
+{company}
+""",
+        "defaults": {"response_timeframe": "3-5 business days"},
+    },
+    "offer": {
+        "title": "Job Offer",
+        "subject": "Job Offer - {role} Position at {company}",
+        "body": """\
+Dear {candidate_name},
+
+We are pleased to extend an offer of employment for the position of {role} at {company}.
+
+Offer Summary:
+- Position: {role}
+- Compensation: {compensation}
+- Work Location: {work_location}
+- Start Date: {start_date}
+
+A formal offer letter with complete terms and conditions will be sent via {offer_delivery} for your review and signature.
+
+Please confirm receipt of this offer and advise us of your decision by {decision_deadline}. Should you have any questions regarding the terms of employment, please contact me directly.
+
+We look forward to your positive response and to welcoming you to our team.
+
+Sincerely,
+{sender_name}
+{sender_title}
+{company}
+""",
+        "defaults": {"offer_delivery": "email"},
+    },
+}
+
+__all__ = ["EMAIL_TEMPLATES"]
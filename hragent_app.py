@@ -1,297 +1,882 @@
 import os
 import json
-from typing import TypedDict, List, Dict
-from dotenv import load_dotenv
-import requests
-from langgraph.graph import StateGraph, END
+import asyncio
+import operator
+import hashlib
+import inspect
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Annotated, TypedDict, List, Dict
 from jd_template_selector import get_template_for_role
+from llm_client import DEFAULT_MODEL, SYSTEM_PROMPT, LLMError, get_async_client
+from llm_cache import cache_enabled, cache_key, get_cache
+from llm_scheduler import role_priority
+from model_router import get_router
+from telemetry import export_metrics, get_metrics, get_tracer, summarize_trace
+from prompt_builder import build_checklist_prompt, build_combined_prompt, build_jd_prompt, estimate_tokens, summarize_usage
+from checkpoint_store import get_checkpoint_store, plan_signature
+from session_store import get_session_store
+from mail_merge import role_emails
+
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
 
 # ---- configuration & environment ----
-load_dotenv()
+# LangGraph, httpx and python-dotenv are imported on first use, and the graph is
+# compiled on the first run, so importing this module stays cheap.
+
+def find_dotenv():
+    # the .env load_dotenv() would pick: next to this file or in a parent directory
+    path = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(path, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+_dotenv_path = find_dotenv()
+if _dotenv_path:
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 USE_API = True  
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# one JSON call per role for JD + checklist instead of two calls (falls back per role)
+COMBINED_GENERATION = os.getenv("COMBINED_GENERATION", "off").lower() in ("1", "on", "true", "yes")
+# hiring company named in the candidate email templates
+COMPANY_NAME = os.getenv("COMPANY_NAME", "Infinite")
+# signature of the workflow's candidate emails ({sender_name} / {sender_title})
+EMAIL_SENDER = {"sender_name": os.getenv("EMAIL_SENDER_NAME", "Hiring Team"),
+                "sender_title": os.getenv("EMAIL_SENDER_TITLE", "Talent Acquisition")}
 
 # ---- session persistence ----
-SESSION_FILE = "session_state.json"
-
-def save_session(state: dict, path=SESSION_FILE):
-    with open(path, "w") as f:
-        json.dump(state, f, indent=2)
-
-def load_session(path=SESSION_FILE) -> dict:
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)
-    return {}
-
-def clear_session(path=SESSION_FILE):
-    if os.path.exists(path):
-        os.remove(path)
+# Saved plans live in session_store (SQLite), one per session ID, so concurrent users
+# never overwrite each other.
+DEFAULT_SESSION_ID = "default"
+
+def save_session(state: dict, session_id: str = DEFAULT_SESSION_ID):
+    get_session_store().save(session_id, state)
+
+def load_session(session_id: str = DEFAULT_SESSION_ID) -> dict:
+    # JDs and other large fields are only read from disk when accessed
+    return get_session_store().load(session_id) or {}
+
+def clear_session(session_id: str = DEFAULT_SESSION_ID):
+    get_session_store().delete(session_id)
+
+# ---- instrumentation ----
+
+@contextmanager
+def traced_call(stage: str, models: list, prompt: str):
+    # one "llm.call" span per logical call (cache, fallbacks and hedges included);
+    # the caller marks it with model / cached / completion_bytes once it has an answer
+    metrics = get_metrics()
+    prompt_bytes = len(prompt.encode("utf-8"))
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        with get_tracer().span("llm.call", stage=stage, route=",".join(models), prompt_bytes=prompt_bytes) as span:
+            yield span
+        outcome = "cached" if span.attributes.get("cached") else "ok"
+    finally:
+        metrics.inc("hragent_llm_calls_total", stage=stage, outcome=outcome)
+        metrics.observe("hragent_llm_call_duration_seconds", time.perf_counter() - started, stage=stage)
+        metrics.observe("hragent_llm_payload_bytes", prompt_bytes, direction="prompt")
+        if outcome == "cached":
+            metrics.inc("hragent_llm_cache_hits_total", stage=stage)
+        if "completion_bytes" in span.attributes:
+            metrics.observe("hragent_llm_payload_bytes", span.attributes["completion_bytes"], direction="completion")
+
+@contextmanager
+def traced_request(model: str):
+    # one "llm.request" span per model tried; record_response fills in what the client saw
+    outcome = "error"
+    try:
+        with get_tracer().span("llm.request", model=model) as span:
+            yield span
+        outcome = "ok"
+    finally:
+        get_metrics().inc("hragent_llm_requests_total", model=model, outcome=outcome)
+
+def record_response(span, response):
+    prompt_tokens = response.usage.get("prompt_tokens", 0)
+    completion_tokens = response.usage.get("completion_tokens", 0)
+    span.set(attempts=response.attempts, queue_wait_s=round(response.queue_wait, 4),
+             prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    metrics = get_metrics()
+    if response.attempts > 1:
+        metrics.inc("hragent_llm_retries_total", response.attempts - 1, model=response.model)
+    metrics.observe("hragent_llm_queue_wait_seconds", response.queue_wait)
+    metrics.inc("hragent_llm_tokens_total", prompt_tokens, model=response.model, type="prompt")
+    metrics.inc("hragent_llm_tokens_total", completion_tokens, model=response.model, type="completion")
+
+def instrumented(name: str, node):
+    """Wrap a graph node in a "node" span and a duration sample."""
+    async def run(state: dict) -> dict:
+        started = time.perf_counter()
+        try:
+            with get_tracer().span("node", node=name):
+                update = node(state)
+                if inspect.isawaitable(update):
+                    update = await update
+        finally:
+            get_metrics().observe("hragent_node_duration_seconds", time.perf_counter() - started, node=name)
+        return update
+
+    run.__name__ = getattr(node, "__name__", name)
+    return run
+
+@contextmanager
+def traced_plan(roles: list, run_id: str):
+    # root span of a run; yields a dict that receives the timing summary at the end
+    tracer, metrics = get_tracer(), get_metrics()
+    timings = {}
+    started = time.perf_counter()
+    status = "failed"
+    try:
+        with tracer.span("plan", collect=True, roles=len(roles), run_id=run_id or "") as span:
+            yield timings
+        status = "ok"
+    finally:
+        metrics.observe("hragent_plan_duration_seconds", time.perf_counter() - started)
+        metrics.inc("hragent_plans_total", status=status)
+        if tracer.enabled:
+            timings.update(summarize_trace(tracer.take(span.trace_id)))
+        export_metrics()
 
 # ---- helper functions ----
 
-def call_openrouter(prompt: str) -> str:
+def cache_lookup(prompt: str, model: str, system: str, use_cache: bool):
+    # use_cache=False skips the lookup but still refreshes the stored entry;
+    # LLM_CACHE=off disables the cache entirely
+    cache = get_cache() if cache_enabled() else None
+    key = cache_key(model, system, prompt)
+    cached = cache.get(key) if cache is not None and use_cache else None
+    return cache, key, cached
+
+
+def route_models(stage: str, model: str) -> list:
+    # a named stage follows its configured model chain; otherwise just ``model``
+    return get_router().models_for(stage) if stage else [model]
+
+def cached_route(prompt: str, models: list, system: str, use_cache: bool):
+    # serve from the cache under any model of the chain, preferring the primary
+    for model in models:
+        cache, key, cached = cache_lookup(prompt, model, system, use_cache)
+        if cached is not None:
+            return cache, model, cached
+    return cache, None, None
+
+MOCK_RESPONSE = "This is a simulated LLM-generated response."
+
+def mock_call(stage: str, prompt: str) -> str:
+    # USE_API=False: no request, but the call is still traced and counted
+    with traced_call(stage or "adhoc", ["mock"], prompt) as span:
+        span.set(model="mock", completion_bytes=len(MOCK_RESPONSE))
+    return MOCK_RESPONSE
+
+def cacheable(content: str, validate) -> bool:
+    if validate is None:
+        return True
+    try:
+        validate(content)
+    except ValueError:
+        return False
+    return True
+
+async def acall_openrouter(prompt: str, model: str = DEFAULT_MODEL, system: str = SYSTEM_PROMPT, use_cache: bool = True, json_mode: bool = False, on_usage=None, priority: tuple = None, stage: str = None, on_route=None, validate=None) -> str:
+    # ``on_usage`` receives the token counts of the call (zero for cache hits);
+    # ``priority`` orders the call in the process-wide rate limiter (earliest first);
+    # ``stage`` picks the model chain from the router, and ``on_route`` receives its decision;
+    # a reply that ``validate`` rejects (ValueError) is never cached, and a cached one is dropped
     if not USE_API:
-        print(f"[Mock LLM Call] Prompt:\n{prompt}")
-        return "This is a simulated LLM-generated response."
-
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "model": "openai/gpt-3.5-turbo",
-        "messages": [
-            {"role": "system", "content": "You are an HR assistant helping startups hire."},
-            {"role": "user", "content": prompt}
-        ]
-    }
-    response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=data)
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    return "Failed to get response."
+        return mock_call(stage, prompt)
+
+    models = route_models(stage, model)
+    with traced_call(stage or "adhoc", models, prompt) as span:
+        cache, cached_model, cached = cached_route(prompt, models, system, use_cache)
+        if cached is not None and not cacheable(cached, validate):
+            cache.delete(cache_key(cached_model, system, prompt))
+            cached = None
+        if cached is not None:
+            span.set(model=cached_model, cached=True, completion_bytes=len(cached.encode("utf-8")))
+            if on_usage is not None:
+                on_usage({"model": cached_model, "prompt_tokens": 0, "completion_tokens": 0, "cached": True})
+            if on_route is not None:
+                on_route({"route": models, "model": cached_model, "cached": True})
+            return cached
+
+        client = get_async_client()
+
+        async def request(candidate):
+            with traced_request(candidate) as request_span:
+                response = await client.achat(prompt, candidate, system, json_mode, priority)
+                record_response(request_span, response)
+            return response
+
+        # raises the last LLMError subclass when every model fails; amap_roles records it
+        response, decision = await get_router().acall(models, request)
+        span.set(model=decision["model"], hedged=decision["hedged"], fallbacks=len(decision["failed"]),
+                 completion_bytes=len(response.content.encode("utf-8")))
+
+    if on_usage is not None:
+        on_usage({
+            "model": response.model,
+            "prompt_tokens": response.usage.get("prompt_tokens", 0),
+            "completion_tokens": response.usage.get("completion_tokens", 0),
+            "cached": False,
+        })
+    if on_route is not None:
+        on_route(decision)
+    if cache is not None and cacheable(response.content, validate):
+        cache.set(cache_key(decision["model"], system, prompt), response.content)
+    return response.content
+
+def call_openrouter(prompt: str, model: str = DEFAULT_MODEL, system: str = SYSTEM_PROMPT, use_cache: bool = True, stage: str = None) -> str:
+    # blocking acall_openrouter on the background loop, so ad-hoc calls are routed and traced too
+    return run_sync(acall_openrouter(prompt, model, system, use_cache, stage=stage))
+
+async def astream_openrouter(prompt: str, on_delta, model: str = DEFAULT_MODEL, system: str = SYSTEM_PROMPT, use_cache: bool = True, on_usage=None, priority: tuple = None, stage: str = None, on_route=None) -> str:
+    # like acall_openrouter, but hands each text delta to ``on_delta`` as it arrives;
+    # cache hits and mock responses are delivered as a single delta. Streams are never
+    # hedged; a model that fails before its first delta falls through to the next one.
+    if not USE_API:
+        content = mock_call(stage, prompt)
+        on_delta(content)
+        return content
+
+    models = route_models(stage, model)
+    with traced_call(stage or "adhoc", models, prompt) as span:
+        cache, cached_model, cached = cached_route(prompt, models, system, use_cache)
+        if cached is not None:
+            on_delta(cached)
+            span.set(model=cached_model, cached=True, completion_bytes=len(cached.encode("utf-8")))
+            if on_usage is not None:
+                on_usage({"model": cached_model, "prompt_tokens": 0, "completion_tokens": 0, "cached": True})
+            if on_route is not None:
+                on_route({"route": models, "model": cached_model, "cached": True})
+            return cached
+
+        decision = {"route": models, "model": None, "failed": [], "hedged": False, "hedge_after_s": None}
+        started = time.perf_counter()
+        parts = []
+        for index, candidate in enumerate(models):
+            candidate_started = time.perf_counter()
+            try:
+                with traced_request(candidate) as request_span:
+                    async for delta in get_async_client().astream_chat(prompt, candidate, system, priority):
+                        if not parts:
+                            request_span.set(time_to_first_token_s=round(time.perf_counter() - candidate_started, 4))
+                        parts.append(delta)
+                        on_delta(delta)
+            except LLMError as exc:
+                if parts or index == len(models) - 1:
+                    raise
+                decision["failed"].append({"model": candidate, "error": f"{type(exc).__name__}: {exc}"})
+                continue
+            get_router().latency.record(candidate, time.perf_counter() - candidate_started)
+            decision["model"] = candidate
+            break
+        decision["latency_s"] = round(time.perf_counter() - started, 3)
+        content = "".join(parts)
+        span.set(model=decision["model"], fallbacks=len(decision["failed"]),
+                 completion_bytes=len(content.encode("utf-8")))
+
+    if on_usage is not None:
+        # streamed responses carry no usage block, so both sides are local estimates
+        on_usage({
+            "model": decision["model"],
+            "prompt_tokens": estimate_tokens(system) + estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(content),
+            "cached": False,
+            "estimated": True,
+        })
+    if on_route is not None:
+        on_route(decision)
+    if cache is not None:
+        cache.set(cache_key(decision["model"], system, prompt), content)
+    return content
+
+async def amap_roles(fn, roles: list, max_concurrency: int = MAX_CONCURRENCY) -> tuple[dict, dict]:
+    """Await ``fn(role)`` for every role with at most ``max_concurrency`` calls in flight.
+
+    Returns ``(results, errors)``, both keyed by role in the order of ``roles``. A role
+    whose call raises lands in ``errors`` instead of failing the whole plan.
+    """
+    roles = list(dict.fromkeys(roles))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def bounded(role):
+        async with semaphore:
+            with get_tracer().span("role", role=role):
+                return await fn(role)
+
+    outcomes = await asyncio.gather(*(bounded(role) for role in roles), return_exceptions=True)
+    results, errors = {}, {}
+    for role, outcome in zip(roles, outcomes):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+        if isinstance(outcome, Exception):
+            errors[role] = f"{type(outcome).__name__}: {outcome}"
+        else:
+            results[role] = outcome
+    return results, errors
+
+# ---- structured output ----
+
+JD_CHECKLIST_SCHEMA = {
+    "type": "object",
+    "required": ["jd", "checklist"],
+    "properties": {
+        "jd": {"type": "string", "pattern": r"\S"},
+        "checklist": {"type": "array", "minItems": 1, "items": {"type": "string", "pattern": r"\S"}},
+    },
+}
+JSON_TYPES = {"object": dict, "array": list, "string": str}
+
+def check_schema(value, schema: dict, path: str = "reply"):
+    """Raise ValueError unless ``value`` satisfies ``schema``.
+
+    Covers the JSON Schema keywords the structured-output schemas use: type, required,
+    properties, items, minItems, minLength and pattern.
+    """
+    expected = schema.get("type")
+    if expected and not isinstance(value, JSON_TYPES[expected]):
+        raise ValueError(f"{path} must be a JSON {expected}")
+    for field in schema.get("required", ()):
+        if field not in value:
+            raise ValueError(f"{path} is missing '{field}'")
+    for field, subschema in schema.get("properties", {}).items():
+        if field in value:
+            check_schema(value[field], subschema, f"'{field}'")
+    if "items" in schema:
+        for index, item in enumerate(value):
+            check_schema(item, schema["items"], f"{path}[{index}]")
+    if len(value) < schema.get("minItems" if isinstance(value, list) else "minLength", 0):
+        raise ValueError(f"{path} is too short")
+    if "pattern" in schema and not re.search(schema["pattern"], value):
+        raise ValueError(f"{path} must match {schema['pattern']!r}")
+
+def parse_combined_response(text: str) -> tuple[str, list]:
+    """Parse a combined JD + checklist reply and validate it against JD_CHECKLIST_SCHEMA.
+
+    Raises ValueError when the reply is not a JSON object of the expected shape.
+    """
+    body = text.strip()
+    if body.startswith("```"):
+        # tolerate a fenced block even though the prompt asks for bare JSON
+        body = body.split("\n", 1)[1] if "\n" in body else ""
+        body = body.rsplit("```", 1)[0]
+    data = json.loads(body)
+    check_schema(data, JD_CHECKLIST_SCHEMA)
+    return data["jd"].strip(), [item.strip().lstrip("•- ").strip() for item in data["checklist"]]
+
+def role_fingerprint(role: str, info: dict) -> str:
+    # everything that shapes this role's LLM output: model routes, system message and both prompts
+    router = get_router()
+    payload = json.dumps([
+        router.models_for("jd"), router.models_for("checklist"), SYSTEM_PROMPT,
+        build_jd_prompt(role, info), build_checklist_prompt(role, info),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def call_priority(state: dict, role: str) -> tuple:
+    # deadline-first ordering in the shared rate limiter; ties go to the older plan
+    return role_priority(state.get("clarifications", {}).get(role, {}), state.get("submitted_at", 0.0))
+
+def usage_recorder(records: list, kind: str, role: str, prompt: str):
+    # on_usage callback that appends one accounting row per LLM call to ``records``
+    def on_usage(usage: dict):
+        estimate = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+        records.append({"kind": kind, "role": role, "estimated_prompt_tokens": estimate, **usage})
+    return on_usage
+
+def route_recorder(records: list, kind: str, role: str):
+    # on_route callback that keeps the router's decision (model, fallbacks, hedge) per call
+    def on_route(decision: dict):
+        records.append({"kind": kind, "role": role, **decision})
+    return on_route
+
+# ---- checkpointing ----
+
+def checkpoint_role(state: dict, kind: str, role: str, value):
+    # persist one per-role LLM result as soon as it arrives
+    if state.get("run_id"):
+        fingerprint = state.get("fingerprints", {}).get(role, "")
+        get_checkpoint_store().save_role(state["run_id"], kind, role, fingerprint, value)
+
+# per-call records a node update carries; never replayed from a checkpoint
+CALL_RECORDS = ("token_usage", "routing")
+
+def covers_missing(saved: dict, state: dict) -> bool:
+    # a saved update only stands in for its node if it holds every role the state still lacks
+    # (roles carried over from ``previous`` on the first run are not in it)
+    covered = set(saved.get("combined_fallbacks", {}))
+    for field in ("job_descriptions", "checklists"):
+        if field in saved:
+            present = state.get(field, {})
+            missing = {r for r in state["roles"] if r not in present} - covered
+            if not missing <= set(saved[field]):
+                return False
+    return True
+
+def checkpointed(name: str, node):
+    """Wrap a branch node so its update is saved, and replayed on resume.
+
+    Updates that carry errors are not saved, so a resumed run retries the failed roles.
+    A saved update that lacks a role the state still needs is not replayed.
+    """
+    async def run(state: dict) -> dict:
+        run_id = state.get("run_id")
+        store = get_checkpoint_store() if run_id else None
+        if store is not None:
+            signature = plan_signature(state["roles"], state.get("fingerprints", {}), state.get("company"))
+            saved = store.load_node(run_id, name, signature)
+            if saved is not None and covers_missing(saved, state):
+                # usage and routing rows describe calls made by the earlier run, not this one
+                return {k: v for k, v in saved.items() if k not in CALL_RECORDS}
+
+        update = node(state)
+        if inspect.isawaitable(update):
+            update = await update
+        if store is not None and not update.get("errors"):
+            store.save_node(run_id, name, signature, {k: v for k, v in update.items() if k not in CALL_RECORDS})
+        return update
+
+    run.__name__ = getattr(node, "__name__", name)
+    return run
 
 # ---- langgraph nodes ----
 
+def stream_writer():
+    # nodes only run inside a compiled graph, so LangGraph is already loaded here
+    from langgraph.config import get_stream_writer
+    return get_stream_writer()
+
 def clarify_node(state: dict) -> dict:
     if state.get("clarified"):
-        return state
+        return {}
 
     if "clarifications" not in state or not state["clarifications"]:
         raise ValueError("No clarifications found in state. Provide them via frontend.")
 
-    state["clarified"] = True
-    return state
+    return {"clarified": True}
 
 
-def jd_generator_node(state: dict) -> dict:
-    roles = state["roles"]
+async def combined_generator_node(state: dict) -> dict:
+    # one JSON call per role; roles whose reply fails to parse are left to the
+    # regular jd_generator/checklist nodes that run next
+    jds, checklists = state.get("job_descriptions", {}), state.get("checklists", {})
+    roles = [r for r in state["roles"] if r not in jds or r not in checklists]
     clar = state.get("clarifications", {})
-    job_descriptions = {}
-
-    for role in roles:
-        info = clar.get(role, {})
-
-        prompt = f"""
-                        Generate a LinkedIn-style job posting for the role: {role}. Use the structure below and incorporate the provided data.
-
-                        **About the Job:**
-                        Introduce the role in the context of a startup. Include the mission, growth stage, and team size if appropriate.
-                        Mention timeline (e.g., "We're looking to fill this role by {info.get('timeline', 'N/A')}").
-
-                        **What You Will Do:**
-                        Write 4–6 bullet points based on:
-                        - {info.get('key_responsibilities', 'N/A')}
-                        - Expected outcomes: {info.get('impact_6months', 'N/A')}
-
-                        **What You Will Bring to the Team:**
-                        Include qualifications from:
-                        - Years of experience: {info.get('years_experience', 'N/A')}
-                        - Must-have skills: {info.get('must_have_skills', 'N/A')}
-                        - Domain experience: {info.get('domain_experience', 'N/A')}
-
-                        **What Gives You an Edge:**
-                        Preferred qualifications based on:
-                        - {info.get('nice_to_have_skills', 'N/A')}
-
-                        **Compensation & Perks:**
-                        - Compensation: {info.get('budget', 'N/A')} {"(Equity included)" if info.get('equity') in ['Yes', 'Y'] else ''}
-                        - Perks: {info.get('perks', 'N/A')}
-                        - Work Setup: {info.get('work_setup', 'N/A')} at {info.get('location', 'Remote')}
-                        - Deadline: {info.get('deadline', 'N/A')}
-
-                        **Equal Opportunity Statement:**
-                        [Company] is an equal opportunity employer. We make hiring decisions based on qualifications without regard to race, religion, national origin, gender, sexual orientation, age, disability, or any other protected status.
-                        """
+    writer = stream_writer() if state.get("stream") else None
+    usage, routing = [], []
+
+    async def generate(role):
+        prompt = build_combined_prompt(role, clar.get(role, {}))
+        response = await acall_openrouter(
+            prompt, use_cache=state.get("use_cache", True), json_mode=True,
+            on_usage=usage_recorder(usage, "combined", role, prompt),
+            priority=call_priority(state, role),
+            stage="combined", on_route=route_recorder(routing, "combined", role),
+            validate=parse_combined_response,
+        )
+        jd, items = parse_combined_response(response)
+        checkpoint_role(state, "jd", role, jd)
+        checkpoint_role(state, "checklist", role, items)
+        if writer is not None:
+            writer({"type": "jd_delta", "role": role, "text": jd})
+            writer({"type": "jd_done", "role": role})
+            writer({"type": "checklist", "role": role, "items": items})
+        return jd, items
+
+    results, failures = await amap_roles(generate, roles, state.get("max_concurrency", MAX_CONCURRENCY))
+    return {
+        "job_descriptions": {role: jd for role, (jd, _) in results.items() if role not in jds},
+        "checklists": {role: items for role, (_, items) in results.items() if role not in checklists},
+        "combined_fallbacks": failures,
+        "token_usage": usage,
+        "routing": routing,
+    }
 
-        job_descriptions[role] = call_openrouter(prompt)
+async def jd_generator_node(state: dict) -> dict:
+    # roles already carried over from a previous run are skipped
+    roles = [r for r in state["roles"] if r not in state.get("job_descriptions", {})]
+    clar = state.get("clarifications", {})
+    # in stream mode partial JD text is emitted as custom stream events per role
+    writer = stream_writer() if state.get("stream") else None
+    usage, routing = [], []
 
-    state["job_descriptions"] = job_descriptions
-    return state
+    async def generate(role):
+        info = clar.get(role, {})
+        prompt = build_jd_prompt(role, info)
+        on_usage = usage_recorder(usage, "jd", role, prompt)
+        on_route = route_recorder(routing, "jd", role)
+        if writer is None:
+            jd = await acall_openrouter(
+                prompt, use_cache=state.get("use_cache", True), on_usage=on_usage,
+                priority=call_priority(state, role), stage="jd", on_route=on_route,
+            )
+        else:
+            jd = await astream_openrouter(
+                prompt,
+                lambda text: writer({"type": "jd_delta", "role": role, "text": text}),
+                use_cache=state.get("use_cache", True),
+                on_usage=on_usage,
+                priority=call_priority(state, role),
+                stage="jd", on_route=on_route,
+            )
+            writer({"type": "jd_done", "role": role})
+        checkpoint_role(state, "jd", role, jd)
+        return jd
+
+    job_descriptions, errors = await amap_roles(generate, roles, state.get("max_concurrency", MAX_CONCURRENCY))
+    return {
+        "job_descriptions": job_descriptions,
+        "errors": {role: [f"JD: {error}"] for role, error in errors.items()},
+        "token_usage": usage,
+        "routing": routing,
+    }
 
-def checklist_node(state: dict) -> dict:
-    roles = state["roles"]
+async def checklist_node(state: dict) -> dict:
+    roles = [r for r in state["roles"] if r not in state.get("checklists", {})]
     clar = state.get("clarifications", {})
-    checklist = {}
+    writer = stream_writer() if state.get("stream") else None
+    usage, routing = [], []
 
-    for role in roles:
+    async def generate(role):
         info = clar.get(role, {})
-        prompt = f"""
-You're an expert technical recruiter. Generate a step-by-step hiring checklist (8–12 items) for a **{role}** in a startup. 
-Each step should be:
-
-- Specific (mention tools or platforms like LinkedIn, HackerRank, etc.)
-- Actionable (e.g., "Draft JD with clear outcomes", "Schedule 60-min system design interview")
-- Professional
-
-Clarification Data:
-- Summary: {info.get('summary')}
-- Budget: {info.get('budget')} {'(Equity)' if info.get('equity') == 'Y' else ''}
-- Timeline: {info.get('timeline')}, Deadline: {info.get('deadline')}
-- Work Setup: {info.get('work_setup')} @ {info.get('location')}
-- Must-Have Skills: {info.get('must_have_skills')}
-- Nice-to-Have: {info.get('nice_to_have_skills')}
-- Domain Experience: {info.get('domain_experience')}
-- Years Exp: {info.get('years_experience')}
-- Key Responsibilities: {info.get('key_responsibilities')}
-- Outcomes Expected: {info.get('impact_6months')}
-
-Format: Bullet list, one item per line.
-Avoid generic phrases like "Hire candidate".
-"""
-
-        response = call_openrouter(prompt)
-        checklist_items = [item.strip("•- ") for item in response.split("\n") if item.strip()]
-        checklist[role] = checklist_items
-
-    state["checklists"] = checklist
-    return state
+        prompt = build_checklist_prompt(role, info)
+
+        response = await acall_openrouter(
+            prompt, use_cache=state.get("use_cache", True),
+            on_usage=usage_recorder(usage, "checklist", role, prompt),
+            priority=call_priority(state, role),
+            stage="checklist", on_route=route_recorder(routing, "checklist", role),
+        )
+        items = [item.strip("•- ") for item in response.split("\n") if item.strip()]
+        checkpoint_role(state, "checklist", role, items)
+        if writer is not None:
+            writer({"type": "checklist", "role": role, "items": items})
+        return items
+
+    checklist, errors = await amap_roles(generate, roles, state.get("max_concurrency", MAX_CONCURRENCY))
+    return {
+        "checklists": checklist,
+        "errors": {role: [f"Checklist: {error}"] for role, error in errors.items()},
+        "token_usage": usage,
+        "routing": routing,
+    }
 
 
 def output_node(state: dict) -> dict:
     roles = state["roles"]
     jds = state["job_descriptions"]
     checklist = state["checklists"]
+    errors = state.get("errors", {})
 
     # markdown
     md = "# Hiring Plan\n\n"
     for role in roles:
-        md += f"## {role}\n\n**Job Description:**\n{jds[role]}\n\n**Checklist:**\n"
-        for item in checklist[role]:
+        md += f"## {role}\n\n"
+        if role in errors:
+            md += f"> ⚠️ Generation failed: {'; '.join(errors[role])}\n\n"
+        md += f"**Job Description:**\n{jds.get(role, '_Not available._')}\n\n**Checklist:**\n"
+        for item in checklist.get(role, []):
             md += f"- {item}\n"
         md += "\n"
 
     # json
     json_obj = {"roles": [
-        {"title": r, "jd": jds[r], "checklist": checklist[r]} for r in roles
+        {"title": r, "jd": jds.get(r), "checklist": checklist.get(r, [])} for r in roles
     ]}
 
-    state["markdown_output"] = md  
-    return state
+    return {"markdown_output": md, "token_totals": summarize_usage(state.get("token_usage", []))}
 
 def email_writer_node(state: dict) -> dict:
-    roles = state["roles"]
-    email_templates = {}
-
-    for role in roles:
-        company = "Infinite"  
-
-        email_templates[role] = {
-            "interview_invite": {
-                "subject": f"Interview Invitation for {role} at {company}",
-                "body": (
-                    f"Hello {{candidate_name}},\n\n"
-                    f"Thank you for applying to {company}. We’d like to invite you to interview for the {role} position.\n\n"
-                    f"Please share your availability this week.\n\n"
-                    f"Best regards,\n{company} Hiring Team"
-                )
-            },
-            "rejection": {
-                "subject": f"Update on Your Application for {role}",
-                "body": (
-                    f"Hello {{candidate_name}},\n\n"
-                    f"Thank you for your interest in the {role} role at {company}. We appreciate the time and effort you put into your application.\n\n"
-                    f"After careful consideration, we’ve decided to move forward with other candidates at this time.\n\n"
-                    f"We wish you all the best in your job search.\n\n"
-                    f"Sincerely,\n{company} Hiring Team"
-                )
-            }
-        }
-
-    state["email_templates"] = email_templates
-    return state
+    # every template in email_templates.py, with role, company and sender filled in;
+    # only candidate slots ({candidate_name}, ...) are left for mail_merge
+    company = state.get("company") or COMPANY_NAME
+    return {"email_templates": {role: role_emails(role, company, EMAIL_SENDER) for role in state["roles"]}}
 
 def template_selector_node(state: dict) -> dict:
     templates = {}
     for role in state["roles"]:
         templates[role] = get_template_for_role(role)
-    state["jd_templates"] = templates
 
 #    print("\n📚 JD Templates:\n")
 #    for role, template in templates.items():
 #        print(f"--- {role} ---\n{template}\n")
 
-    return state
+    return {"jd_templates": templates}
 
 # ---- langgraph setup ----
 
-class AgentState(dict):
-    roles: list
-    clarified: bool
-    job_descriptions: dict
-    checklists: dict
-
-graph = StateGraph(dict)
+# Merge rules for keys written by the parallel branches: each branch returns only
+# the roles it produced, so per-role dicts are unioned and error lists concatenated.
+def merge_dicts(left: dict, right: dict) -> dict:
+    return {**(left or {}), **(right or {})}
 
-graph.add_node("clarify", clarify_node)
-graph.add_node("jd_generator", jd_generator_node)
-graph.add_node("checklist", checklist_node)
-graph.add_node("output", output_node)
-graph.add_node("email_writer", email_writer_node)
-graph.add_node("template_selector", template_selector_node)
+def merge_errors(left: dict, right: dict) -> dict:
+    merged = {role: list(messages) for role, messages in (left or {}).items()}
+    for role, messages in (right or {}).items():
+        merged.setdefault(role, []).extend(messages)
+    return merged
 
-graph.set_entry_point("clarify")
-graph.add_edge("clarify", "jd_generator")
-graph.add_edge("jd_generator", "checklist")
-graph.add_edge("checklist", "output")
-graph.add_edge("output", "email_writer")
-graph.add_edge("email_writer", "template_selector")
-graph.add_edge("template_selector", END)
+class AgentState(TypedDict, total=False):
+    roles: list
+    clarifications: dict
+    clarified: bool
+    max_concurrency: int
+    use_cache: bool
+    stream: bool
+    combined: bool
+    combined_fallbacks: dict
+    company: str
+    run_id: str
+    fingerprints: dict
+    recomputed_roles: list
+    submitted_at: float
+    job_descriptions: Annotated[dict, merge_dicts]
+    checklists: Annotated[dict, merge_dicts]
+    email_templates: Annotated[dict, merge_dicts]
+    jd_templates: Annotated[dict, merge_dicts]
+    errors: Annotated[dict, merge_errors]
+    # one row per LLM call (kind, role, prompt/completion tokens); summed into token_totals
+    token_usage: Annotated[list, operator.add]
+    token_totals: dict
+    # one row per LLM call: model chain, the model that answered, fallbacks and hedging
+    routing: Annotated[list, operator.add]
+    # per-plan timing summary from the trace (see telemetry.summarize_trace)
+    timings: dict
+    markdown_output: str
+
+# Nodes that only need the clarified roles; they run as concurrent branches
+# and join before the output node.
+BRANCH_NODES = {
+    "jd_generator": jd_generator_node,
+    "checklist": checklist_node,
+    "email_writer": email_writer_node,
+    "template_selector": template_selector_node,
+}
+
+def build_graph(combined: bool = False) -> "StateGraph":
+    #   clarify -> {jd_generator, checklist, email_writer, template_selector} -> output
+    # in combined mode a single-call JSON node runs first on the LLM path:
+    #   clarify -> combined_generator -> {jd_generator, checklist} (fallback roles only)
+    from langgraph.graph import END, StateGraph
+
+    graph = StateGraph(AgentState)
+
+    graph.add_node("clarify", instrumented("clarify", clarify_node))
+    for name, node in BRANCH_NODES.items():
+        graph.add_node(name, instrumented(name, checkpointed(name, node)))
+    graph.add_node("output", instrumented("output", output_node))
 
-app = graph.compile()
+    graph.set_entry_point("clarify")
+    llm_nodes = ("jd_generator", "checklist")
+    if combined:
+        graph.add_node("combined_generator", instrumented("combined_generator", checkpointed("combined_generator", combined_generator_node)))
+        graph.add_edge("clarify", "combined_generator")
+    for name in BRANCH_NODES:
+        graph.add_edge("combined_generator" if combined and name in llm_nodes else "clarify", name)
+    graph.add_edge(list(BRANCH_NODES), "output")
+    graph.add_edge("output", END)
+    return graph
+
+@lru_cache(maxsize=None)
+def get_app(combined: bool = False):
+    # the graphs are static, so each variant is compiled once per process and shared
+    return build_graph(combined).compile()
+
+def __getattr__(name: str):
+    # ``app``, the default compiled graph, is built on first access instead of at import
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ---- run the graph ----
 
-def run_agent_workflow(roles: list[str], clarifications: dict, resume=False) -> dict:
+def reusable_outputs(roles: list[str], fingerprints: dict, previous: dict) -> tuple[dict, dict]:
+    """Pick the JDs and checklists from ``previous`` whose role fingerprint is unchanged."""
+    prev_fingerprints = previous.get("fingerprints", {})
+    unchanged = [r for r in roles if prev_fingerprints.get(r) == fingerprints[r]]
+    prev_jds = previous.get("job_descriptions", {})
+    prev_checklists = previous.get("checklists", {})
+    return (
+        {r: prev_jds[r] for r in unchanged if r in prev_jds},
+        {r: prev_checklists[r] for r in unchanged if r in prev_checklists},
+    )
+
+def complete_clarifications(roles: list[str], clarifications) -> dict:
+    """One clarification object per role; roles without one are generated from the title alone.
+
+    Raises ValueError naming the field when the shape is wrong.
+    """
+    if not isinstance(clarifications, dict):
+        raise ValueError("'clarifications' must be an object keyed by role.")
+    for role, info in clarifications.items():
+        if not isinstance(info, dict):
+            raise ValueError(f"'clarifications.{role}' must be an object of answers.")
+    return {role: clarifications.get(role, {}) for role in roles}
+
+def check_previous(previous) -> dict:
+    # ``previous`` is an earlier result; only its per-role dicts are read
+    if previous is None:
+        return {}
+    if not isinstance(previous, dict):
+        raise ValueError("'previous' must be an earlier plan result (an object).")
+    for field in ("fingerprints", "job_descriptions", "checklists"):
+        if not isinstance(previous.get(field, {}), dict):
+            raise ValueError(f"'previous.{field}' must be an object keyed by role.")
+    return previous
+
+def prepare_state(roles: list[str], clarifications: dict, resume=False, max_concurrency: int = MAX_CONCURRENCY, use_cache: bool = True, previous: dict = None, run_id: str = None, stream: bool = False, combined: bool = COMBINED_GENERATION, company: str = COMPANY_NAME) -> dict:
+    # pass the last result as ``previous`` to only regenerate new or edited roles;
+    # resume=True also picks up every node/role checkpointed under ``run_id``
+    # (checkpointing is off unless a run_id is given)
+    fingerprints = {role: role_fingerprint(role, clarifications.get(role, {})) for role in roles}
+    job_descriptions, checklists = reusable_outputs(roles, fingerprints, previous or {})
+
+    if run_id:
+        store = get_checkpoint_store()
+        if resume:
+            job_descriptions.update(store.load_roles(run_id, "jd", fingerprints))
+            checklists.update(store.load_roles(run_id, "checklist", fingerprints))
+        else:
+            store.clear(run_id)
+
     session_state = {
         "roles": roles,
         "clarifications": clarifications,
         "clarified": resume,
-        "job_descriptions": {},
-        "checklists": {}
+        "max_concurrency": max_concurrency,
+        "use_cache": use_cache,
+        "stream": stream,
+        "combined": combined,
+        "company": company,
+        "run_id": run_id,
+        "fingerprints": fingerprints,
+        "recomputed_roles": [r for r in roles if r not in job_descriptions or r not in checklists],
+        "job_descriptions": job_descriptions,
+        "checklists": checklists,
+        "errors": {},
+        "token_usage": [],
+        "routing": [],
+        "submitted_at": time.time(),
     }
-
-    graph = StateGraph(dict)
-    graph.add_node("clarify", clarify_node)
-    graph.add_node("jd_generator", jd_generator_node)
-    graph.add_node("checklist", checklist_node)
-    graph.add_node("output", output_node)
-    graph.add_node("email_writer", email_writer_node)
-    graph.add_node("template_selector", template_selector_node)
-
-    graph.set_entry_point("clarify")
-    graph.add_edge("clarify", "jd_generator")
-    graph.add_edge("jd_generator", "checklist")
-    graph.add_edge("checklist", "output")
-    graph.add_edge("output", "email_writer")
-    graph.add_edge("email_writer", "template_selector")
-    graph.add_edge("template_selector", END)
-
-    app = graph.compile()
-    final_state = app.invoke(session_state)
+    return session_state
+
+async def arun_agent_workflow(roles: list[str], clarifications: dict, resume=False, max_concurrency: int = MAX_CONCURRENCY, use_cache: bool = True, previous: dict = None, run_id: str = None, combined: bool = COMBINED_GENERATION, company: str = COMPANY_NAME) -> dict:
+    session_state = prepare_state(roles, clarifications, resume, max_concurrency, use_cache, previous, run_id, combined=combined, company=company)
+    graph = get_app(combined)  # compiled outside the plan span, so only the run is timed
+    with traced_plan(roles, run_id) as timings:
+        final_state = await graph.ainvoke(session_state)
+    final_state["timings"] = timings
     return final_state
 
+async def astream_agent_workflow(roles: list[str], clarifications: dict, resume=False, max_concurrency: int = MAX_CONCURRENCY, use_cache: bool = True, previous: dict = None, run_id: str = None, combined: bool = COMBINED_GENERATION, company: str = COMPANY_NAME):
+    """Run the workflow in stream mode, yielding progress events as they happen.
+
+    Events are dicts with a ``type`` of ``"jd_delta"`` (``role``, ``text``), ``"jd_done"``
+    (``role``), ``"checklist"`` (``role``, ``items``) and finally ``"result"`` (``state``).
+    """
+    session_state = prepare_state(roles, clarifications, resume, max_concurrency, use_cache, previous, run_id, stream=True, combined=combined, company=company)
+    final_state = session_state
+    graph = get_app(combined)
+    with traced_plan(roles, run_id) as timings:
+        async for mode, chunk in graph.astream(session_state, stream_mode=["custom", "values"]):
+            if mode == "custom":
+                yield chunk
+            else:
+                final_state = chunk
+    yield {"type": "result", "state": {**final_state, "timings": timings}}
+
+# The sync API drives the async one on a single background event loop, so every
+# caller thread shares one loop and one pooled async HTTP client.
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="hragent-loop", daemon=True).start()
+    return _loop
+
+def run_sync(coro):
+    loop = get_background_loop()
+    if threading.current_thread().name == "hragent-loop":
+        coro.close()
+        raise RuntimeError("Blocking call from the workflow event loop; await the async API instead.")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+def run_agent_workflow(roles: list[str], clarifications: dict, resume=False, max_concurrency: int = MAX_CONCURRENCY, use_cache: bool = True, previous: dict = None, run_id: str = None, combined: bool = COMBINED_GENERATION, company: str = COMPANY_NAME) -> dict:
+    return run_sync(arun_agent_workflow(
+        roles, clarifications, resume=resume, max_concurrency=max_concurrency,
+        use_cache=use_cache, previous=previous, run_id=run_id, combined=combined, company=company,
+    ))
+
+def stream_agent_workflow(roles: list[str], clarifications: dict, **kwargs):
+    # blocking iterator over astream_agent_workflow events, fed from the background loop
+    events = queue.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async for event in astream_agent_workflow(roles, clarifications, **kwargs):
+                events.put(event)
+        except Exception as exc:
+            events.put(exc)
+        finally:
+            events.put(finished)
+
+    if threading.current_thread().name == "hragent-loop":
+        raise RuntimeError("Blocking call from the workflow event loop; use astream_agent_workflow instead.")
+    asyncio.run_coroutine_threadsafe(pump(), get_background_loop())
+    while True:
+        event = events.get()
+        if event is finished:
+            return
+        if isinstance(event, Exception):
+            raise event
+        yield event
+
 # ---- main function ----
 
 if __name__ == "__main__":
     print("🧠 Starting Agentic Hiring Flow with LangGraph...\n")
+    print("(For bulk plans from a JSONL file use: python hragent_batch.py --help)\n")
 
     roles = ["Founding Engineer", "GenAI Intern"]
+    clarifications = {}
     resume = False
 
     use_prev = input("🔁 Resume previous session? (Y/N): ").strip().lower()
     if use_prev == "y":
         session_state = load_session()
         roles = session_state.get("roles", roles)
+        clarifications = session_state.get("clarifications", {})
         resume = True
     else:
         clear_session()
 
-    result = run_agent_workflow(roles, resume=resume)
+    # without saved clarifications, generate from the role titles alone
+    clarifications = {role: clarifications.get(role, {}) for role in roles}
+    result = run_agent_workflow(roles, clarifications, resume=resume, run_id="cli")
     save_session(result)
+    print(result["markdown_output"])
 
-    clear = input("🧹 Clear session file after run? (Y/N): ").strip().lower()
+    clear = input("🧹 Clear saved session after run? (Y/N): ").strip().lower()
     if clear == "y":
         clear_session()
 
-__all__ = ["run_agent_workflow"]
\ No newline at end of file
+__all__ = ["run_agent_workflow", "arun_agent_workflow", "stream_agent_workflow", "astream_agent_workflow", "get_app"]
\ No newline at end of file
@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from hragent_app import COMPANY_NAME, MAX_CONCURRENCY, arun_agent_workflow, complete_clarifications
+from checkpoint_store import get_checkpoint_store
+from llm_cache import get_cache
+from llm_client import request_count
+
+# Each input line is one plan request:
+#   {"id": "eng-q3", "roles": ["Software Engineer", ...], "clarifications": {"Software Engineer": {...}}}
+# "id" is optional; records without one are identified by a hash of their content so a
+# re-run can still recognise them. Lines that are not plan requests (no "roles") are skipped.
+
+MIN_RATE_SECONDS = 0.05  # shorter runs report no throughput
+
+# ---- input / output ----
+
+def record_id(record: dict) -> str:
+    if record.get("id"):
+        return str(record["id"])
+    payload = json.dumps([record.get("roles"), record.get("clarifications")], sort_keys=True)
+    return "sha-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def iter_records(path: str):
+    # lazily yields (line number, record or error); never holds the whole file in memory
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield lineno, ValueError(f"invalid JSON: {exc}")
+                continue
+            if not isinstance(record, dict) or "roles" not in record:
+                continue
+            roles = record.get("roles")
+            if not isinstance(roles, list) or not roles or not all(isinstance(r, str) and r.strip() for r in roles):
+                yield lineno, ValueError("'roles' must be a non-empty list of role titles")
+                continue
+            try:
+                # roles without clarifications are generated from the title alone
+                record["clarifications"] = complete_clarifications(roles, record.get("clarifications") or {})
+            except ValueError as exc:
+                yield lineno, exc
+                continue
+            yield lineno, record
+
+
+def completed_ids(path: str) -> set:
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # a torn last line from an interrupted run
+            if row.get("status") == "done":
+                done.add(row["id"])
+            else:
+                done.discard(row.get("id"))
+    return done
+
+
+def safe_filename(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name)[:120] or "plan"
+
+# ---- runner ----
+
+async def run_record(record: dict, use_cache: bool, max_concurrency: int) -> dict:
+    rid = record_id(record)
+    run_id = f"batch:{rid}"
+    started = time.perf_counter()
+    try:
+        # resume=True picks up per-role checkpoints left by an interrupted earlier run
+        state = await arun_agent_workflow(
+            record["roles"], record["clarifications"],
+            resume=True, max_concurrency=max_concurrency, use_cache=use_cache, run_id=run_id,
+            company=record.get("company") or COMPANY_NAME,
+        )
+    except Exception as exc:
+        return {"id": rid, "status": "failed", "error": f"{type(exc).__name__}: {exc}",
+                "elapsed_s": round(time.perf_counter() - started, 3)}
+
+    errors = state.get("errors", {})
+    if not errors:
+        get_checkpoint_store().clear(run_id)
+    return {
+        "id": rid,
+        "status": "partial" if errors else "done",
+        "roles": state["roles"],
+        "job_descriptions": state.get("job_descriptions", {}),
+        "checklists": state.get("checklists", {}),
+        "errors": errors,
+        "token_totals": state.get("token_totals", {}),
+        "timings": state.get("timings", {}),
+        "markdown_output": state.get("markdown_output", ""),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+
+
+async def run_batch(input_path: str, output_path: str, markdown_dir: str = None, parallel: int = 4,
+                    max_concurrency: int = MAX_CONCURRENCY, use_cache: bool = True) -> dict:
+    skip = completed_ids(output_path)
+    if markdown_dir:
+        os.makedirs(markdown_dir, exist_ok=True)
+
+    counts = {"done": 0, "partial": 0, "failed": 0, "skipped": 0, "invalid": 0}
+    requests_before = request_count()
+    cache_hits_before = get_cache().stats()["hits"]
+    started = time.perf_counter()
+    pending = set()
+
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        def write(row: dict):
+            markdown = row.pop("markdown_output", None)
+            if markdown_dir and markdown:
+                with open(os.path.join(markdown_dir, safe_filename(row["id"]) + ".md"), "w", encoding="utf-8") as md:
+                    md.write(markdown)
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+            counts[row["status"]] += 1
+
+        async def drain(return_when):
+            nonlocal pending
+            done, pending = await asyncio.wait(pending, return_when=return_when)
+            for task in done:
+                write(task.result())
+
+        for lineno, record in iter_records(input_path):
+            if isinstance(record, Exception):
+                print(f"[batch] line {lineno}: skipped, {record}", file=sys.stderr)
+                counts["invalid"] += 1
+                continue
+            if record_id(record) in skip:
+                counts["skipped"] += 1
+                continue
+            # keep at most `parallel` plans in flight so memory stays flat on huge inputs
+            if len(pending) >= parallel:
+                await drain(asyncio.FIRST_COMPLETED)
+            pending.add(asyncio.create_task(run_record(record, use_cache, max_concurrency)))
+
+        if pending:
+            await drain(asyncio.ALL_COMPLETED)
+
+    elapsed = time.perf_counter() - started
+    processed = counts["done"] + counts["partial"] + counts["failed"]
+    llm_requests = request_count() - requests_before
+    # rates only mean something when plans actually ran for a measurable time
+    measured = processed > 0 and elapsed >= MIN_RATE_SECONDS
+    return {
+        **counts,
+        "elapsed_s": round(elapsed, 3),
+        "plans_per_min": round(processed / elapsed * 60, 2) if measured else None,
+        "llm_requests": llm_requests,
+        "llm_requests_per_s": round(llm_requests / elapsed, 2) if measured else None,
+        "cache_hits": get_cache().stats()["hits"] - cache_hits_before,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate hiring plans in bulk from a JSONL file of plan requests.")
+    parser.add_argument("input", help="JSONL file, one {roles, clarifications[, id]} object per line")
+    parser.add_argument("-o", "--output", default="hiring_plans.jsonl",
+                        help="JSONL results file; appended to, and used to skip finished records on re-run")
+    parser.add_argument("--markdown-dir", help="also write each plan as <id>.md into this directory")
+    parser.add_argument("-p", "--parallel", type=int, default=4, help="plans generated concurrently")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY,
+                        help="per-role LLM calls in flight within one plan")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the LLM response cache")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_batch(
+        args.input, args.output, markdown_dir=args.markdown_dir, parallel=max(1, args.parallel),
+        max_concurrency=args.max_concurrency, use_cache=not args.no_cache,
+    ))
+    rate = (f"{report['plans_per_min']} plans/min, " if report["plans_per_min"] is not None else "")
+    per_s = f" ({report['llm_requests_per_s']}/s)" if report["llm_requests_per_s"] is not None else ""
+    print(
+        f"✅ {report['done']} done, {report['partial']} partial, {report['failed']} failed, "
+        f"{report['skipped']} skipped, {report['invalid']} invalid in {report['elapsed_s']}s\n"
+        f"📈 {rate}{report['llm_requests']} LLM requests{per_s}, {report['cache_hits']} cache hits",
+        file=sys.stderr,
+    )
+    return 0 if report["failed"] == 0 and report["partial"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
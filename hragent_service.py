@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hragent_app import COMPANY_NAME, check_previous, complete_clarifications, get_app, run_agent_workflow, run_sync
+from llm_cache import get_cache
+from llm_client import circuit_state, get_async_client
+from llm_scheduler import get_scheduler
+from model_router import get_router
+from telemetry import get_metrics
+
+# ---- configuration ----
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "8"))
+MAX_RETAINED_JOBS = int(os.getenv("SERVICE_MAX_JOBS", "1000"))
+
+# ---- job registry ----
+
+class JobRegistry:
+    """Runs plan requests on a shared worker pool and keeps their results by job ID.
+
+    Finished jobs beyond ``max_retained`` are dropped oldest-first so a long-running
+    service does not grow without bound.
+    """
+
+    def __init__(self, workers: int = SERVICE_WORKERS, max_retained: int = MAX_RETAINED_JOBS):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plan")
+        self.max_retained = max_retained
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, request: dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {"job_id": job_id, "status": "queued", "submitted_at": time.time()}
+            self._trim()
+        self.pool.submit(self._run, job_id, request)
+        return job_id
+
+    def _run(self, job_id: str, request: dict):
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            result = run_plan(request)
+        except Exception as exc:
+            self._update(job_id, status="failed", finished_at=time.time(),
+                         error=f"{type(exc).__name__}: {exc}")
+            traceback.print_exc()
+            return
+        self._update(job_id, status="done", finished_at=time.time(), result=result)
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _trim(self):
+        finished = [jid for jid, job in self._jobs.items() if job["status"] in ("done", "failed")]
+        for jid in finished[:max(0, len(self._jobs) - self.max_retained)]:
+            del self._jobs[jid]
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def counts(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+
+def validate_request(request) -> dict:
+    if not isinstance(request, dict):
+        raise ValueError("Request body must be a JSON object.")
+    roles = request.get("roles")
+    if not isinstance(roles, list) or not roles or not all(isinstance(r, str) and r.strip() for r in roles):
+        raise ValueError("'roles' must be a non-empty list of role titles.")
+    request["clarifications"] = complete_clarifications(roles, request.get("clarifications"))
+    check_previous(request.get("previous"))
+    for field in ("run_id", "company"):
+        if request.get(field) is not None and not isinstance(request[field], str):
+            raise ValueError(f"'{field}' must be a string.")
+    return request
+
+
+def run_plan(request: dict) -> dict:
+    # checkpoints are only kept when the caller names a run_id it may resume later
+    return run_agent_workflow(
+        request["roles"],
+        request["clarifications"],
+        resume=bool(request.get("resume", False)),
+        use_cache=bool(request.get("use_cache", True)),
+        previous=request.get("previous"),
+        run_id=request.get("run_id"),
+        company=request.get("company") or COMPANY_NAME,
+    )
+
+# ---- http layer ----
+
+def make_handler(jobs: JobRegistry):
+
+    class PlanHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: dict):
+            self._send_raw(status, json.dumps(body, default=str).encode("utf-8"), "application/json")
+
+        def _send_raw(self, status: int, payload: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {
+                    "status": "ok",
+                    "jobs": jobs.counts(),
+                    "llm_cache": get_cache().stats(),
+                    "circuit": circuit_state(),
+                    "rate_limiter": get_scheduler().stats(),
+                    "models": get_router().stats(),
+                })
+            elif self.path == "/metrics":
+                # Prometheus text exposition of every plan, node and LLM call in this process
+                self._send_raw(200, get_metrics().render().encode("utf-8"), "text/plain; version=0.0.4")
+            elif self.path.startswith("/plans/"):
+                job = jobs.get(self.path[len("/plans/"):])
+                if job is None:
+                    self._send(404, {"error": "Unknown job ID."})
+                else:
+                    self._send(200, job)
+            else:
+                self._send(404, {"error": "Not found."})
+
+        def do_POST(self):
+            if self.path.split("?")[0] != "/plans":
+                self._send(404, {"error": "Not found."})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = validate_request(json.loads(self.rfile.read(length) or b"null"))
+            except ValueError as exc:
+                self._send(400, {"error": str(exc)})
+                return
+
+            # "wait": false (or ?async=1) returns a job ID to poll at /plans/<id>
+            if request.get("wait") is False or "async=1" in self.path:
+                self._send(202, {"job_id": jobs.submit(request), "status": "queued"})
+                return
+            try:
+                self._send(200, {"status": "done", "result": run_plan(request)})
+            except Exception as exc:
+                self._send(500, {"status": "failed", "error": f"{type(exc).__name__}: {exc}"})
+
+        def log_message(self, fmt, *args):
+            print(f"[service] {self.address_string()} {fmt % args}")
+
+    return PlanHandler
+
+
+async def warm_client():
+    # plans run on the shared background loop, so its async client (and pool) is the one to warm
+    get_async_client().http
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, workers: int = SERVICE_WORKERS):
+    # warm everything a plan needs before accepting traffic
+    get_app()
+    run_sync(warm_client())
+    get_cache()
+
+    jobs = JobRegistry(workers=workers)
+    server = ThreadingHTTPServer((host, port), make_handler(jobs))
+    server.daemon_threads = True
+    print(f"🧠 Hiring plan service listening on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-running hiring plan service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS,
+                        help="plans processed concurrently for async (job ID) requests")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
@@ -1,8 +1,228 @@
-from jd_templates import JD_TEMPLATES
+import math
+import os
+import re
+from collections import Counter, deque
+from functools import lru_cache
+from jd_templates import JD_TEMPLATES, JD_TEMPLATE_ALIASES
+
+NO_TEMPLATE = "No predefined template found for this role."
+
+# fuzzy matches scoring below this cosine similarity fall back to NO_TEMPLATE
+FUZZY_THRESHOLD = float(os.getenv("JD_FUZZY_THRESHOLD", "0.6"))
+
+ABBREVIATIONS = {
+    "sr": "senior", "snr": "senior", "jr": "junior", "jnr": "junior",
+    "dev": "developer", "devs": "developer", "eng": "engineer", "engr": "engineer",
+    "mgr": "manager", "mngr": "manager", "mktg": "marketing", "acct": "account",
+    "assoc": "associate", "asst": "assistant", "exec": "executive",
+}
+# intern templates only match titles that say so, however close the rest of the title is
+INTERN_WORD = re.compile(r"\bintern(ship)?s?\b")
+# seniority and level words that say nothing about which template fits
+LEVEL_WORDS = {
+    "senior", "junior", "lead", "principal", "staff", "associate", "assistant", "entry",
+    "level", "mid", "i", "ii", "iii", "iv", "v", "1", "2", "3", "4",
+}
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a fixed set of keywords.
+
+    One pass over a title finds every keyword occurring in it, however many keywords
+    there are. ``longest`` picks the most specific hit, so "software engineering intern"
+    wins over "software engineer" regardless of dictionary order.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(index)
+
+        # breadth-first failure links; each state inherits the outputs of its fallback
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def matches(self, text: str):
+        """Yield ``(start, keyword_index)`` for every keyword occurrence in ``text``."""
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for index in self.output[state]:
+                yield position - len(self.keywords[index]) + 1, index
+
+    def longest(self, text: str):
+        # longest keyword wins; ties go to the leftmost, then to the first-declared keyword
+        best = None
+        for start, index in self.matches(text):
+            rank = (-len(self.keywords[index]), start, index)
+            if best is None or rank < best:
+                best = rank
+        return self.keywords[best[2]] if best else None
+
+
+@lru_cache(maxsize=1)
+def get_keyword_index() -> tuple:
+    # built on first lookup, so importing this module does not load the template store.
+    # Template keys match as plain substrings (as they always have); aliases only on
+    # whole words, which is what the surrounding spaces enforce.
+    targets = {
+        **{key: key for key in JD_TEMPLATES},
+        **{f" {alias} ": key for alias, key in JD_TEMPLATE_ALIASES.items()},
+    }
+    return KeywordMatcher(targets), targets
+
+
+def normalize_title(role_name: str) -> str:
+    tokens = []
+    for token in role_name.lower().split():
+        bare = token.strip(".,;:()")
+        tokens.append(ABBREVIATIONS.get(bare, token))
+    return " ".join(tokens)
+
+
+@lru_cache(maxsize=8192)
+def match_template_key(role_name: str):
+    """Return the JD_TEMPLATES key whose name or alias occurs in ``role_name``, or None."""
+    matcher, targets = get_keyword_index()
+    best = matcher.longest(f" {normalize_title(role_name)} ")
+    if best is None:
+        return None
+    return targets[best]
+
+# ---- fuzzy matching ----
+
+def fuzzy_text(role_name: str) -> str:
+    words = re.findall(r"[a-z0-9]+", normalize_title(role_name))
+    return " ".join(w for w in words if w not in LEVEL_WORDS) or " ".join(words)
+
+
+def char_ngrams(text: str, n: int = 3) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+class FuzzyTemplateIndex:
+    """Character-trigram TF-IDF index over template keys and aliases, queried by cosine.
+
+    Everything runs locally with NumPy; a batch of titles is scored with a single
+    matrix product against the index.
+    """
+
+    def __init__(self, entries: dict):
+        import numpy as np
+
+        self.np = np
+        self.labels = list(entries.values())
+        self.intern_rows = np.array([bool(INTERN_WORD.search(label)) for label in self.labels])
+        grams = [char_ngrams(fuzzy_text(text)) for text in entries]
+        self.vocab = {g: i for i, g in enumerate(sorted({g for counts in grams for g in counts}))}
+
+        df = np.zeros(len(self.vocab), dtype=np.float32)
+        for counts in grams:
+            for g in counts:
+                df[self.vocab[g]] += 1
+        self.idf = np.log((1 + len(grams)) / (1 + df)) + 1
+        self.unknown_idf = float(math.log(1 + len(grams)) + 1)
+
+        self.matrix = np.zeros((len(grams), len(self.vocab)), dtype=np.float32)
+        for row, counts in enumerate(grams):
+            for g, count in counts.items():
+                self.matrix[row, self.vocab[g]] = count * self.idf[self.vocab[g]]
+        self.matrix /= np.linalg.norm(self.matrix, axis=1, keepdims=True)
+
+    def _vectorize(self, titles: list):
+        np = self.np
+        queries = np.zeros((len(titles), len(self.vocab)), dtype=np.float32)
+        norms = np.zeros(len(titles), dtype=np.float32)
+        for row, title in enumerate(titles):
+            squared = 0.0
+            for g, count in char_ngrams(fuzzy_text(title)).items():
+                col = self.vocab.get(g)
+                weight = count * (self.idf[col] if col is not None else self.unknown_idf)
+                squared += weight * weight
+                if col is not None:
+                    queries[row, col] = weight
+            # unseen trigrams still count towards the norm, so mostly-unknown titles score low
+            norms[row] = math.sqrt(squared) or 1.0
+        return queries / norms[:, None]
+
+    def query_many(self, titles: list) -> list:
+        if not titles:
+            return []
+        np = self.np
+        scores = self._vectorize(titles) @ self.matrix.T
+        not_intern = np.array([not INTERN_WORD.search(normalize_title(title)) for title in titles])
+        scores[np.ix_(not_intern, self.intern_rows)] = -1.0
+        best = scores.argmax(axis=1)
+        return [(self.labels[i], float(scores[row, i])) for row, i in enumerate(best)]
+
+
+@lru_cache(maxsize=1)
+def get_fuzzy_index() -> FuzzyTemplateIndex:
+    # built on first fuzzy lookup so plain lookups never pay for NumPy
+    return FuzzyTemplateIndex({**{key: key for key in JD_TEMPLATES}, **JD_TEMPLATE_ALIASES})
+
+
+def match_templates(titles, threshold: float = None) -> list:
+    """Resolve many titles to ``(template_key or None, confidence)`` pairs.
+
+    Exact name/alias hits score 1.0. The rest are scored together against the fuzzy
+    index; a best score below ``threshold`` yields ``(None, score)``.
+    """
+    threshold = FUZZY_THRESHOLD if threshold is None else threshold
+    titles = list(titles)
+    results = [None] * len(titles)
+    unresolved = {}
+    for i, title in enumerate(titles):
+        key = match_template_key(title)
+        if key is not None:
+            results[i] = (key, 1.0)
+        else:
+            unresolved.setdefault(title, []).append(i)
+
+    if unresolved:
+        for title, (key, score) in zip(unresolved, get_fuzzy_index().query_many(list(unresolved))):
+            for i in unresolved[title]:
+                results[i] = (key if score >= threshold else None, score)
+    return results
+
+
+def match_template(role_name: str, threshold: float = None) -> tuple:
+    return match_templates([role_name], threshold)[0]
+
+# ---- public lookups ----
 
 def get_template_for_role(role_name: str) -> str:
-    name = role_name.lower()
-    for key in JD_TEMPLATES:
-        if key in name:
-            return JD_TEMPLATES[key]
-    return "No predefined template found for this role."
+    key = match_template_key(role_name)
+    if key is None:
+        key, _ = match_template(role_name)
+    if key is not None:
+        return JD_TEMPLATES[key]
+    return NO_TEMPLATE
+
+
+def resolve_many(titles) -> list:
+    return [JD_TEMPLATES[key] if key is not None else NO_TEMPLATE for key, _ in match_templates(titles)]
@@ -1,35 +1,84 @@
-JD_TEMPLATES = {
-    "founding engineer": "Join our founding team as a Founding Engineer, building core features and scalable systems from the ground up. You’ll work across the stack—design, implement, and maintain mission-critical services, collaborating closely with product and leadership. Ideal candidates have strong technical skills, thrive in fast-paced settings, and are eager to shape product direction.",
-    "software engineer": "Join our founding team as a Software Engineer, building core features and scalable systems from the ground up. You’ll work across the stack—design, implement, and maintain mission-critical services, collaborating closely with product and leadership. Ideal candidates have strong technical skills, thrive in fast-paced settings, and are eager to shape product direction.",
-    "backend engineer": "Join our founding team as a Backend Engineer, building core features and scalable systems from the ground up. You’ll work across the stack—design, implement, and maintain mission-critical services, collaborating closely with product and leadership. Ideal candidates have strong technical skills, thrive in fast-paced settings, and are eager to shape product direction.",
-    "frontend engineer": "Join our founding team as a Frontend Engineer, building core features and scalable systems from the ground up. You’ll work across the stack—design, implement, and maintain mission-critical services, collaborating closely with product and leadership. Ideal candidates have strong technical skills, thrive in fast-paced settings, and are eager to shape product direction.",
-    "product manager": "As our Product Manager, you’ll define product vision, partner with engineering and design to deliver features, and own the roadmap from discovery to launch. You will gather requirements from users, prioritize initiatives, and ensure alignment between cross-functional teams for maximum impact.",
-    "data scientist": "We’re seeking a Data Scientist to analyze product data and deliver actionable insights. You will build data models, create dashboards, and inform product and business strategy. A strong candidate loves diving into datasets, visualizing trends, and communicating findings to both technical and non-technical audiences.",
-    "data analyst": "We’re seeking a Data Analyst to analyze product data and deliver actionable insights. You will build data models, create dashboards, and inform product and business strategy. A strong candidate loves diving into datasets, visualizing trends, and communicating findings to both technical and non-technical audiences.",
-    "devops engineer": "Join as our DevOps Engineer to own cloud infrastructure, deployment pipelines, and system reliability. You will automate build/test/release processes, optimize performance, and respond to incidents. Success means minimal downtime and fast, smooth deploys for our growing platform.",
-    "qa engineer": "As QA Engineer, you will design and implement test plans for new features, develop automated coverage, and champion product quality. You’ll work alongside engineering to find and fix bugs, ensure robust releases, and continuously improve our test frameworks.",
-    "test automation": "As QA Engineer, you will design and implement test plans for new features, develop automated coverage, and champion product quality. You’ll work alongside engineering to find and fix bugs, ensure robust releases, and continuously improve our test frameworks.",
-    "ux/ui designer": "Shape user experiences as our UX/UI Designer. You’ll create wireframes, prototypes, and high-fidelity interfaces for new features, working closely with product and engineering. Your designs should delight users and help drive conversion and engagement.",
-    "product designer": "As Product Designer, you iterate quickly on product flows and visual concepts, delivering design assets from sketches to development-ready files. You combine user research, design thinking, and keen visual skills to solve complex problems elegantly.",
-    "growth engineer": "We need a Growth Engineer to drive user acquisition and product-led growth. You’ll experiment with features, run A/B tests, and implement tracking for key metrics. Collaboration with marketing and data is essential; you’ll build and measure viral loops, onboarding, and retention-focused features.",
-    "sales representative": "As a Sales Representative, you’ll prospect, qualify, and close new business for our startup’s core product. You will build relationships, understand customer needs, and convey our solution’s value. Success is measured by pipeline growth and closed deals.",
-    "sales director": "As a Sales Director you’ll prospect, qualify, and close new business for our startup’s core product. You will build relationships, understand customer needs, and convey our solution’s value. Success is measured by pipeline growth and closed deals.",
-    "business development manager": "Build partnerships, uncover new markets, and expand our client base as Business Development Manager. You’ll identify strategic opportunities, negotiate agreements, and work cross-functionally to deliver value to customers and partners.",
-    "customer success manager": "You’ll onboard new clients, ensure product adoption, and act as the main point of contact for support. By understanding user goals, you’ll help retain and grow key accounts and collect feedback to shape product improvements.",
-    "marketing specialist": "As Marketing Specialist, you’ll create and execute campaigns to drive brand awareness and customer growth. You will manage digital channels, analyze results, and iterate rapidly on creative and messaging to maximize ROI.",
-    "growth marketer": "As Growth Marketer, you’ll create and execute campaigns to drive brand awareness and customer growth. You will manage digital channels, analyze results, and iterate rapidly on creative and messaging to maximize ROI.",
-    "account manager": "Nurture client relationships post-sale, ensure satisfaction, and facilitate renewals and upsells. You’ll be the customer’s advocate internally, coordinating solutions to meet their evolving needs.",
-    "office manager": "As Office Manager, you oversee daily operations, ensuring smooth logistics, supply management, and an efficient, welcoming environment for the team.",
-    "recruiter": "Lead end-to-end recruitment for our growing team. You will source, engage, and assess candidates, work with hiring managers to define roles, and drive an exceptional candidate experience.",
-    "talent acquisition": "Lead end-to-end recruitment for our growing team. You will source, engage, and assess candidates, work with hiring managers to define roles, and drive an exceptional candidate experience.",
-    "finance manager": "As Finance Manager, you will manage budgets, financial reporting, and fundraising support. You’ll partner with founders on strategic planning and ensure sound financial controls as we scale.",
-    "cfo": "As CFO, you will manage budgets, financial reporting, and fundraising support. You’ll partner with founders on strategic planning and ensure sound financial controls as we scale.",
-    "operations manager": "Own business processes, manage workflows, and optimize efficiency as Operations Manager. You will build systems for scale, track metrics, and help solve emerging operational challenges.",
-    "hr manager": "Drive HR initiatives, from hiring and onboarding to policy development and employee engagement. You’ll foster culture, ensure compliance, and support team growth.",
-    "people ops": "Drive HR initiatives, from hiring and onboarding to policy development and employee engagement. You’ll foster culture, ensure compliance, and support team growth.",
-    "software engineering intern": "Join our engineering team as an intern and gain hands-on experience building features in a fast-paced startup. You’ll contribute to real projects, learn modern tech stacks, and work with experienced mentors.",
-    "product intern": "Assist our product team in research, documentation, and user testing. You’ll help analyze feedback, prioritize ideas, and contribute to launching meaningful features.",
-    "marketing intern": "As Marketing Intern, you’ll support campaign execution, social media, and analytics. Develop content, gather customer insights, and help measure the impact of go-to-market activity.",
-    "operations intern": "Support our operations and finance teams in day-to-day business tasks. Help streamline processes, maintain documentation, and work behind the scenes to keep the company running smoothly.",
-    "genai intern": "As a GenAI Intern, you’ll help research, prototype, and integrate generative AI solutions into our product. You’ll collaborate with engineering and product teams, experimenting with LLM APIs, validation tools, and user-facing features."
-}
+import json
+import os
+import sys
+import threading
+from collections.abc import Mapping
+
+# Template data lives in jd_templates.json:
+#   "templates" – each distinct JD body once, with a {role} slot for the role title
+#   "roles"     – template key -> {"template": <template id>, "role": <title to fill in>}
+#   "aliases"   – alternative titles -> template key (matched on whole words after
+#                 abbreviations such as "sr." or "dev" are expanded)
+TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jd_templates.json")
+
+
+class TemplateRegistry(Mapping):
+    """Read-only ``key -> JD text`` mapping backed by the JSON template store.
+
+    The file is read on first access, not at import. Rendered texts are interned per
+    ``(template id, role)``, so keys that share a body and title share one string.
+    """
+
+    def __init__(self, path: str = TEMPLATES_PATH):
+        self.path = path
+        self._data = None
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    for key, entry in data["roles"].items():
+                        if entry["template"] not in data["templates"]:
+                            raise ValueError(f"JD template '{key}' refers to unknown template id '{entry['template']}'")
+                    self._data = data
+        return self._data
+
+    def render(self, template_id: str, role: str = None) -> str:
+        cache_key = (template_id, role)
+        text = self._rendered.get(cache_key)
+        if text is None:
+            body = self.data["templates"][template_id]
+            text = sys.intern(body.replace("{role}", role) if role else body)
+            self._rendered[cache_key] = text
+        return text
+
+    def template_id(self, key: str) -> str:
+        return self.data["roles"][key]["template"]
+
+    def __getitem__(self, key: str) -> str:
+        entry = self.data["roles"][key]
+        return self.render(entry["template"], entry.get("role"))
+
+    def __iter__(self):
+        return iter(self.data["roles"])
+
+    def __len__(self) -> int:
+        return len(self.data["roles"])
+
+    def __contains__(self, key) -> bool:
+        return key in self.data["roles"]
+
+
+class AliasTable(Mapping):
+    """Lazy view of the registry's ``alias -> template key`` table."""
+
+    def __init__(self, registry: TemplateRegistry):
+        self.registry = registry
+
+    def __getitem__(self, alias: str) -> str:
+        return self.registry.data["aliases"][alias]
+
+    def __iter__(self):
+        return iter(self.registry.data["aliases"])
+
+    def __len__(self) -> int:
+        return len(self.registry.data["aliases"])
+
+
+JD_TEMPLATES = TemplateRegistry()
+JD_TEMPLATE_ALIASES = AliasTable(JD_TEMPLATES)
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# ---- configuration ----
+DEFAULT_CACHE_PATH = ".llm_cache.sqlite"
+DEFAULT_TTL = 7 * 24 * 3600          # seconds
+DEFAULT_MEMORY_ENTRIES = 512
+DEFAULT_DISK_ENTRIES = 20000
+
+
+def cache_key(model: str, system: str, prompt: str) -> str:
+    payload = json.dumps([model, system, prompt], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Two-tier completion cache: an in-memory LRU in front of a SQLite file.
+
+    Entries are content-addressed by ``cache_key(model, system, prompt)``. Both tiers
+    honour ``ttl``; the memory tier is bounded by ``max_memory_entries`` (LRU) and the
+    disk tier by ``max_disk_entries`` (least recently used rows are pruned). Pass
+    ``path=None`` for a memory-only cache.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        ttl: Optional[float] = DEFAULT_TTL,
+        max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        max_disk_entries: int = DEFAULT_DISK_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_count = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    # ---- storage ----
+
+    def _connect(self):
+        if self._db is None and self.path:
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions(accessed_at)")
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return self._db
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _remember(self, key: str, value: str, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    # ---- public api ----
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            db = self._connect()
+            if db is not None:
+                row = db.execute("SELECT value, created_at FROM completions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        db.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._remember(key, row[0], row[1])
+                        self._stats["disk_hits"] += 1
+                        return row[0]
+                    db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self._disk_count -= 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["writes"] += 1
+            db = self._connect()
+            if db is None:
+                return
+            inserted = db.execute(
+                "INSERT OR IGNORE INTO completions (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            ).rowcount
+            if inserted:
+                self._disk_count += 1
+            else:
+                db.execute(
+                    "UPDATE completions SET value = ?, created_at = ?, accessed_at = ? WHERE key = ?",
+                    (value, now, now, key),
+                )
+            if self._disk_count > self.max_disk_entries:
+                self._prune(db, now)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+            db = self._connect()
+            if db is not None and db.execute("DELETE FROM completions WHERE key = ?", (key,)).rowcount:
+                self._disk_count -= 1
+
+    def _prune(self, db, now: float):
+        # drop expired rows, then trim the least recently used tenth below the cap
+        if self.ttl is not None:
+            db.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl,))
+        count = db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        excess = count - int(self.max_disk_entries * 0.9)
+        if excess > 0:
+            db.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            count -= excess
+        self._stats["evictions"] += max(0, self._disk_count - count)
+        self._disk_count = count
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._connect()
+            if db is not None:
+                db.execute("DELETE FROM completions")
+            self._disk_count = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._disk_count
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+# ---- shared instance ----
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                ttl = os.getenv("LLM_CACHE_TTL")
+                _cache = LLMCache(
+                    path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+                    ttl=float(ttl) if ttl else DEFAULT_TTL,
+                    max_memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", DEFAULT_MEMORY_ENTRIES)),
+                    max_disk_entries=int(os.getenv("LLM_CACHE_DISK_ENTRIES", DEFAULT_DISK_ENTRIES)),
+                )
+    return _cache
+
+def cache_enabled() -> bool:
+    return os.getenv("LLM_CACHE", "on").lower() not in ("0", "off", "false", "no")
+
+__all__ = ["LLMCache", "cache_key", "get_cache", "cache_enabled"]
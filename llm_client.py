@@ -0,0 +1,459 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from llm_scheduler import DEFAULT_COMPLETION_TOKENS, LLMScheduler, get_scheduler
+from prompt_builder import estimate_tokens
+
+# ---- configuration ----
+# Env overrides are read when a client is built (not at import) so values from
+# .env loaded by the caller are honoured.
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+DEFAULT_MODEL = "openai/gpt-3.5-turbo"
+SYSTEM_PROMPT = "You are an HR assistant helping startups hire."
+
+def env_number(name: str, default, cast=float):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# ---- errors ----
+
+class LLMError(Exception):
+    """Base class for every failure surfaced by the LLM client."""
+
+class LLMTimeoutError(LLMError):
+    pass
+
+class LLMConnectionError(LLMError):
+    pass
+
+class LLMHTTPError(LLMError):
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(f"HTTP {status}: {message}".strip(": "))
+        self.status = status
+
+class LLMRateLimitError(LLMHTTPError):
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(429, message)
+        self.retry_after = retry_after
+
+class LLMResponseError(LLMError):
+    """The provider answered 200 but the body is not a usable completion."""
+
+class CircuitOpenError(LLMError):
+    pass
+
+# ---- results ----
+
+@dataclass
+class LLMResponse:
+    content: str
+    model: str
+    usage: dict = field(default_factory=dict)
+    attempts: int = 1
+    latency: float = 0.0
+    queue_wait: float = 0.0   # seconds spent waiting on the rate limiter, all attempts
+
+# ---- request accounting ----
+
+_request_count = 0
+_request_count_lock = threading.Lock()
+
+def count_request():
+    global _request_count
+    with _request_count_lock:
+        _request_count += 1
+
+def request_count() -> int:
+    """HTTP requests sent to the provider by every client in this process, retries included."""
+    return _request_count
+
+# ---- circuit breaker ----
+
+class CircuitBreaker:
+    """Fails fast once the provider has failed ``failure_threshold`` times in a row.
+
+    After ``reset_timeout`` seconds one trial call is let through (half-open); its
+    outcome closes the circuit again or re-opens it for another timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        return self.admit() is not None
+
+    def admit(self) -> Optional[str]:
+        # None to fail fast, "trial" for the one half-open call, else "closed"
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return None
+            self._trial_in_flight = True
+            return "trial"
+
+    def release_trial(self):
+        # the trial ended without an outcome (e.g. it was cancelled); let the next call try
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+# ---- helpers ----
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    # full jitter, but never retry sooner than the provider asked us to
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+def build_payload(prompt: str, model: str, system: str, json_mode: bool = False) -> dict:
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ]
+    }
+    if json_mode:
+        # ask for a bare JSON object; providers that ignore this are still parsed defensively
+        payload["response_format"] = {"type": "json_object"}
+    return payload
+
+def parse_stream_line(line: str) -> Optional[str]:
+    """Return the text delta carried by one server-sent-events line, if any.
+
+    Comments (``: keep-alive``), blank lines, ``[DONE]`` and role-only chunks yield None.
+    """
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        chunk = json.loads(data)
+    except ValueError as exc:
+        raise LLMResponseError(f"Invalid stream chunk: {data[:200]}") from exc
+    if "error" in chunk:
+        raise LLMResponseError(f"Provider error mid-stream: {chunk['error']}")
+    try:
+        return chunk["choices"][0].get("delta", {}).get("content") or None
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+def parse_completion(body: dict, model: str) -> tuple[str, str, dict]:
+    try:
+        content = body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError) as exc:
+        raise LLMResponseError(f"Malformed completion body: {exc!r}") from exc
+    if not isinstance(content, str):
+        raise LLMResponseError("Completion content is not a string")
+    return content, body.get("model", model), body.get("usage") or {}
+
+def check_status(status: int, headers, text: str):
+    if status == 429:
+        raise LLMRateLimitError(text[:200], parse_retry_after(headers.get("Retry-After")))
+    if status != 200:
+        raise LLMHTTPError(status, text[:200])
+
+# ---- clients ----
+
+class BaseOpenRouterClient:
+    """Configuration, retry policy and circuit-breaker bookkeeping of the OpenRouter client."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        pool_size: Optional[int] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        self.api_key = api_key if api_key is not None else os.getenv("OPENROUTER_API_KEY")
+        base_url = base_url or os.getenv("OPENROUTER_BASE_URL") or DEFAULT_BASE_URL
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.connect_timeout = connect_timeout if connect_timeout is not None else env_number("LLM_CONNECT_TIMEOUT", 5.0)
+        self.read_timeout = read_timeout if read_timeout is not None else env_number("LLM_READ_TIMEOUT", 60.0)
+        self.max_retries = max_retries if max_retries is not None else env_number("LLM_MAX_RETRIES", 3, int)
+        self.pool_size = pool_size if pool_size is not None else env_number("LLM_POOL_SIZE", 32, int)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.scheduler = scheduler or LLMScheduler()
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    @staticmethod
+    def _reserve_tokens(payload: dict) -> int:
+        # what the rate limiter holds back for a call until its real usage is known
+        return sum(estimate_tokens(m["content"]) for m in payload["messages"]) + DEFAULT_COMPLETION_TOKENS
+
+    def _settle(self, reserved: int, usage: dict):
+        used = usage.get("total_tokens") or (usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0))
+        if used:  # without a usage block the reservation stands
+            self.scheduler.settle(reserved, used)
+
+    def _settle_stream(self, reserved: int, text: str):
+        # streamed replies carry no usage block: the prompt estimate plus the streamed text
+        self.scheduler.settle(reserved, reserved - DEFAULT_COMPLETION_TOKENS + estimate_tokens(text))
+
+    def _before_attempt(self) -> bool:
+        # True when this attempt is the breaker's half-open trial
+        admitted = self.breaker.admit()
+        if admitted is None:
+            raise CircuitOpenError("OpenRouter circuit is open; failing fast")
+        count_request()
+        return admitted == "trial"
+
+    def _after_failure(self, exc: LLMError, attempt: int) -> float:
+        """Record ``exc`` and return the delay before the next attempt, or re-raise."""
+        # only outages count against the breaker; a 429 or 4xx means the provider is up
+        if self._is_provider_fault(exc):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if attempt > self.max_retries or not self._is_retryable(exc):
+            raise exc
+        delay = backoff_delay(attempt - 1, self.backoff_base, self.backoff_max,
+                              getattr(exc, "retry_after", None))
+        if isinstance(exc, LLMRateLimitError):
+            # hold back every caller in the process, not only this retry
+            self.scheduler.backoff(delay)
+        return delay
+
+    @staticmethod
+    def _is_retryable(exc: LLMError) -> bool:
+        if isinstance(exc, LLMHTTPError):
+            return exc.status in RETRYABLE_STATUS
+        return isinstance(exc, (LLMTimeoutError, LLMConnectionError))
+
+    @staticmethod
+    def _is_provider_fault(exc: LLMError) -> bool:
+        if isinstance(exc, LLMHTTPError):
+            return exc.status >= 500
+        return isinstance(exc, (LLMTimeoutError, LLMConnectionError, LLMResponseError))
+
+
+class AsyncOpenRouterClient(BaseOpenRouterClient):
+    """Chat-completions client on a pooled keep-alive ``httpx.AsyncClient``.
+
+    The underlying connection pool belongs to the event loop it was first used on;
+    use ``get_async_client()`` to get the instance for the running loop.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._http = None
+        self._slots = None
+
+    @property
+    def http(self):
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self._http
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # at most pool_size requests reach httpx at once; the rest wait here, because the
+        # pool's own bookkeeping grows with connections x queued requests and becomes
+        # the bottleneck when hundreds of calls pile into it
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        return self._slots
+
+    async def achat(self, prompt: str, model: str = DEFAULT_MODEL, system: str = SYSTEM_PROMPT, json_mode: bool = False,
+                    priority: Optional[tuple] = None) -> LLMResponse:
+        """One chat completion; ``priority`` orders this call in the shared rate limiter's queue."""
+        payload = build_payload(prompt, model, system, json_mode)
+        reserved = self._reserve_tokens(payload)
+        started = time.perf_counter()
+        attempt, queue_wait = 0, 0.0
+
+        while True:
+            waited = time.perf_counter()
+            await self.scheduler.acquire(priority, reserved)
+            queue_wait += time.perf_counter() - waited
+            trial = self._before_attempt()
+            attempt += 1
+            try:
+                content, used_model, usage = await self._apost(payload, model)
+            except LLMError as exc:
+                # a failed attempt produced no completion; the next attempt reserves afresh
+                self.scheduler.settle(reserved, 0)
+                await asyncio.sleep(self._after_failure(exc, attempt))
+                continue
+            except BaseException:
+                # cancelled (a losing hedge, a timeout): no verdict on the provider, and
+                # the reservation stands since the provider may have done the work
+                if trial:
+                    self.breaker.release_trial()
+                raise
+
+            self.breaker.record_success()
+            self._settle(reserved, usage)
+            return LLMResponse(content, used_model, usage, attempt, time.perf_counter() - started, queue_wait)
+
+    async def astream_chat(self, prompt: str, model: str = DEFAULT_MODEL, system: str = SYSTEM_PROMPT,
+                           priority: Optional[tuple] = None):
+        """Yield completion text deltas as the provider streams them (SSE).
+
+        Connection and status failures are retried like ``achat`` until the first delta
+        arrives; after that a broken stream is raised, since the caller already has output.
+        """
+        import httpx
+
+        payload = {**build_payload(prompt, model, system), "stream": True}
+        reserved = self._reserve_tokens(payload)
+        attempt = 0
+
+        while True:
+            await self.scheduler.acquire(priority, reserved)
+            trial = self._before_attempt()
+            attempt += 1
+            parts = []
+            try:
+                async with self.slots, self.http.stream("POST", self.url, json=payload) as response:
+                    if response.status_code != 200:
+                        await response.aread()
+                        check_status(response.status_code, response.headers, response.text)
+                    async for line in response.aiter_lines():
+                        delta = parse_stream_line(line)
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+            except httpx.TimeoutException as exc:
+                error = LLMTimeoutError(str(exc) or type(exc).__name__)
+            except httpx.TransportError as exc:
+                error = LLMConnectionError(str(exc) or type(exc).__name__)
+            except LLMError as exc:
+                error = exc
+            except BaseException:
+                # closed by the consumer or cancelled; a stream that was flowing shows the provider is up
+                if parts:
+                    self.breaker.record_success()
+                    self._settle_stream(reserved, "".join(parts))
+                elif trial:
+                    self.breaker.release_trial()
+                raise
+            else:
+                self.breaker.record_success()
+                self._settle_stream(reserved, "".join(parts))
+                return
+
+            if parts:
+                self.breaker.record_failure()
+                self._settle_stream(reserved, "".join(parts))
+                raise error
+            self.scheduler.settle(reserved, 0)
+            await asyncio.sleep(self._after_failure(error, attempt))
+
+    async def _apost(self, payload: dict, model: str) -> tuple[str, str, dict]:
+        import httpx
+
+        try:
+            async with self.slots:
+                response = await self.http.post(self.url, json=payload)
+        except httpx.TimeoutException as exc:
+            raise LLMTimeoutError(str(exc) or type(exc).__name__) from exc
+        except httpx.TransportError as exc:
+            raise LLMConnectionError(str(exc) or type(exc).__name__) from exc
+
+        check_status(response.status_code, response.headers, response.text)
+        try:
+            body = response.json()
+        except ValueError as exc:
+            raise LLMResponseError(f"Invalid JSON body: {exc}") from exc
+        return parse_completion(body, model)
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+# ---- shared instances ----
+
+# the per-loop clients share one breaker so all see the provider's health, and one
+# scheduler so every request in the process counts against the same rate limits
+_breaker = CircuitBreaker()
+_async_clients = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+def circuit_state() -> str:
+    # the shared breaker's state, without building a client
+    return _breaker.state
+
+def get_async_client() -> AsyncOpenRouterClient:
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = AsyncOpenRouterClient(breaker=_breaker, scheduler=get_scheduler())
+    return client
+
+__all__ = [
+    "AsyncOpenRouterClient", "CircuitBreaker", "LLMResponse",
+    "get_async_client", "circuit_state", "request_count",
+    "LLMError", "LLMTimeoutError", "LLMConnectionError", "LLMHTTPError",
+    "LLMRateLimitError", "LLMResponseError", "CircuitOpenError",
+]
@@ -0,0 +1,285 @@
+import asyncio
+import calendar
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+# ---- configuration ----
+# Unset (or 0) limits mean unthrottled: calls are sent as soon as they are made.
+DEFAULT_BURST_SECONDS = 10.0      # bucket capacity, in seconds' worth of the per-minute rate
+DEFAULT_COMPLETION_TOKENS = 600   # reserved per call until the real usage is known
+MAX_IDLE_WAIT = 1.0               # waiters re-check at least this often
+
+
+def env_limit(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "", "0") else None
+
+
+class TokenBucket:
+    """Refills at ``per_minute / 60`` units per second up to ``capacity``.
+
+    The level may go negative (``adjust`` settles a reservation against real usage, and
+    ``pause`` pushes refills back after a 429), so later callers wait off the debt.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = DEFAULT_BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        # seconds until ``amount`` is available; a request larger than the bucket only
+        # needs a full bucket, otherwise it could never be served
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def adjust(self, amount: float):
+        self.level = min(self.capacity, self.level - amount)
+
+    def pause(self, seconds: float, now: float):
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+        self.updated = max(self.updated, now + seconds)
+
+
+class Waiter:
+    __slots__ = ("cost", "cancelled", "granted", "_loop", "_event")
+
+    def __init__(self, cost: float, loop: asyncio.AbstractEventLoop):
+        self.cost = cost
+        self.cancelled = False
+        self.granted = False
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def wake(self):
+        # may be called from any thread; the waiter is woken on its own loop
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass  # its loop has closed; nothing is waiting any more
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+
+class LLMScheduler:
+    """Process-wide admission control for LLM requests.
+
+    Every attempt waits for one request and its estimated tokens from two token buckets
+    (requests/min and tokens/min). Waiters are served strictly in ``priority`` order
+    (lower first), so when the limit is the bottleneck the most urgent roles go out
+    first. Only the head of the queue sleeps for refills; it wakes the next one when
+    granted. Works across threads and event loops.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 burst_seconds: float = DEFAULT_BURST_SECONDS):
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self._queue = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.waited = 0.0
+
+    @property
+    def limited(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def _enqueue(self, priority: Optional[tuple], waiter: Waiter):
+        if priority is None:
+            priority = (float("inf"), time.time())
+        with self._lock:
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+
+    def _try_grant(self, waiter: Waiter) -> Optional[float]:
+        """0 once granted, else the seconds to sleep (None: not at the head, wait to be woken)."""
+        with self._lock:
+            while self._queue and self._queue[0][2].cancelled:
+                heapq.heappop(self._queue)
+            if self._queue[0][2] is not waiter:
+                return None
+
+            now = time.monotonic()
+            delay = max(
+                self.requests.delay(1, now) if self.requests else 0.0,
+                self.tokens.delay(waiter.cost, now) if self.tokens else 0.0,
+            )
+            if delay > 0:
+                return delay
+
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(waiter.cost)
+            heapq.heappop(self._queue)
+            waiter.granted = True
+            self.granted += 1
+            head = self._queue[0][2] if self._queue else None
+        if head is not None:
+            head.wake()
+        return 0.0
+
+    def _abandon(self, waiter: Waiter):
+        # a cancelled head must hand its turn to the next waiter
+        with self._lock:
+            waiter.cancelled = True
+            while self._queue and self._queue[0][2].cancelled:
+                heapq.heappop(self._queue)
+            head = self._queue[0][2] if self._queue else None
+        if head is not None:
+            head.wake()
+
+    async def acquire(self, priority: Optional[tuple] = None, tokens: float = 0):
+        """Wait, without blocking the event loop, until this call may be sent.
+
+        Calls without a ``priority`` queue behind every deadline, in arrival order.
+        """
+        if not self.limited:
+            return
+        waiter = Waiter(tokens, asyncio.get_running_loop())
+        self._enqueue(priority, waiter)
+        started = time.monotonic()
+        try:
+            while True:
+                delay = self._try_grant(waiter)
+                if delay == 0:
+                    break
+                await waiter.wait(MAX_IDLE_WAIT if delay is None else min(delay, MAX_IDLE_WAIT))
+        finally:
+            if not waiter.granted:
+                self._abandon(waiter)
+        with self._lock:
+            self.waited += time.monotonic() - started
+
+    def settle(self, reserved: float, used: float):
+        # replace a call's token reservation with what it actually used (0 for a failed attempt)
+        if self.tokens is not None and used != reserved:
+            with self._lock:
+                self.tokens.adjust(used - reserved)
+
+    def backoff(self, seconds: float):
+        # the provider said 429: hold every bucket until its Retry-After has passed
+        if seconds and seconds > 0:
+            with self._lock:
+                now = time.monotonic()
+                for bucket in (self.requests, self.tokens):
+                    if bucket is not None:
+                        bucket.pause(seconds, now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": sum(1 for _, _, w in self._queue if not w.cancelled),
+                "granted": self.granted,
+                "waited_s": round(self.waited, 3),
+                "requests_per_minute": self.requests.rate * 60 if self.requests else None,
+                "tokens_per_minute": self.tokens.rate * 60 if self.tokens else None,
+            }
+
+# ---- priorities ----
+
+MONTHS = {name.lower(): i for names in (calendar.month_abbr, calendar.month_name)
+          for i, name in enumerate(names) if name}
+MONTHS["sept"] = 9
+RELATIVE_UNITS = {"day": 1, "week": 7, "month": 30}
+
+
+def parse_deadline(text, now: Optional[datetime] = None) -> Optional[float]:
+    """Best-effort timestamp for a free-text deadline such as "2025-09-30", "Sep 30",
+    "in 3 weeks", "Q4 2025", "Dec 2025" or "ASAP". Unrecognised text yields None.
+
+    Explicit and relative dates win over urgency words, so "3 weeks from now" is three
+    weeks out, and a negated keyword ("not urgent", "no rush") is no deadline at all.
+    """
+    if not text or not isinstance(text, str):
+        return None
+    now = now or datetime.now()
+    value = text.strip().lower()
+
+    match = re.search(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b", value)
+    if match:
+        try:
+            return datetime(*map(int, match.groups())).timestamp()
+        except ValueError:
+            return None
+    # a day is at most two digits, so "Dec 2025" is a month and year, not Dec 20
+    for match in re.finditer(r"\b([a-z]+)\.?\s+(\d{1,2})(?!\d)(?:\D+(\d{4}))?"
+                             r"|(?<!\d)(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?([a-z]+)\.?(?:\s+(\d{4}))?", value):
+        month_name, day, year = (match.group(1), match.group(2), match.group(3)) if match.group(1) \
+            else (match.group(5), match.group(4), match.group(6))
+        if month_name not in MONTHS:
+            continue
+        try:
+            moment = datetime(int(year or now.year), MONTHS[month_name], int(day))
+        except ValueError:
+            return None
+        if not year and moment < now - timedelta(days=1):
+            moment = moment.replace(year=moment.year + 1)
+        return moment.timestamp()
+    for match in re.finditer(r"\b([a-z]+)\.?,?\s+(\d{4})\b", value):
+        if match.group(1) in MONTHS:
+            # "Dec 2025" / "December 2025": the end of that month
+            year, month = int(match.group(2)), MONTHS[match.group(1)]
+            return datetime(year, month, calendar.monthrange(year, month)[1]).timestamp()
+    match = re.search(r"\bq([1-4])(?:\s*(\d{4}))?\b", value)
+    if match:
+        year = int(match.group(2) or now.year)
+        month = int(match.group(1)) * 3
+        return datetime(year, month, calendar.monthrange(year, month)[1]).timestamp()
+    match = re.search(r"\b(\d+)\s*(day|week|month)s?\b", value)
+    if match:
+        return (now + timedelta(days=int(match.group(1)) * RELATIVE_UNITS[match.group(2)])).timestamp()
+
+    if re.search(r"\b(not|no|non)\b[\s-]*(?:very\s+|so\s+|that\s+)?(urgent|asap|immediate|rush|hurry)", value):
+        return None
+    if re.search(r"\b(asap|urgent|urgently|immediately|immediate|now)\b", value.replace("from now", "")):
+        return now.timestamp()
+    return None
+
+
+def role_priority(info: dict, submitted_at: float) -> tuple:
+    # earliest deadline first (the hard deadline, else the target timeline); roles
+    # without one go last; ties are broken by when the plan was submitted
+    deadline = parse_deadline(info.get("deadline")) or parse_deadline(info.get("timeline"))
+    return (deadline if deadline is not None else float("inf"), submitted_at)
+
+# ---- shared instance ----
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler(
+                    env_limit("LLM_REQUESTS_PER_MINUTE"),
+                    env_limit("LLM_TOKENS_PER_MINUTE"),
+                    env_limit("LLM_RATE_BURST_SECONDS") or DEFAULT_BURST_SECONDS,
+                )
+    return _scheduler
+
+__all__ = ["LLMScheduler", "TokenBucket", "get_scheduler", "parse_deadline", "role_priority"]
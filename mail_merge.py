@@ -0,0 +1,319 @@
+import csv
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+from email_templates import EMAIL_TEMPLATES
+
+# Bulk candidate emails from the templates in email_templates.py:
+#
+#   python mail_merge.py candidates.csv -t interview_invite --set role="Founding Engineer" \
+#       --set company=Acme --set sender_name="Jane Doe" --set sender_title="Head of Talent" -o emails.jsonl
+#   python mail_merge.py candidates.jsonl -t rejection ... --eml-dir outbox/ --from "Acme Hiring <jobs@acme.com>"
+#
+# Candidate columns are matched to slots by name ("Candidate Name" -> candidate_name);
+# an "email" column is the recipient. Rows are read, rendered and written one at a
+# time, so memory stays flat however many candidates there are. The email package and
+# argparse are only imported by the .eml writer and the CLI (hragent_app imports this
+# module for role_emails).
+
+SLOT_PATTERN = re.compile(r"\{\{|\}\}|\{([A-Za-z_][A-Za-z0-9_]*)\}|\{[^{}]*\}?|\}")
+COLUMN_ALIASES = {"name": "candidate_name", "full_name": "candidate_name", "email_address": "email"}
+ON_MISSING = ("skip", "error", "blank")
+
+
+class TemplateError(ValueError):
+    pass
+
+# ---- compiled templates ----
+
+class CompiledTemplate:
+    """A template parsed once into alternating literal text and slot names.
+
+    ``parts`` holds literals at even indices and slot names at odd ones, so rendering is
+    one list copy, a lookup per slot and a join, with no re-parsing per email.
+    """
+
+    __slots__ = ("source", "parts", "slots", "_positions")
+
+    def __init__(self, source: str):
+        parts = [""]
+        last = 0
+        for match in SLOT_PATTERN.finditer(source):
+            parts[-1] += source[last:match.start()]
+            token = match.group(0)
+            if token in ("{{", "}}"):
+                parts[-1] += token[0]
+            elif match.group(1):
+                parts += [match.group(1), ""]
+            else:
+                line = source.count("\n", 0, match.start()) + 1
+                raise TemplateError(f"malformed placeholder {token!r} on line {line} (use {{{{ and }}}} for literal braces)")
+            last = match.end()
+        parts[-1] += source[last:]
+        self.source = source
+        self.parts = tuple(parts)
+        self.slots = frozenset(parts[1::2])
+        self._positions = range(1, len(parts), 2)
+
+    def render(self, values: dict) -> str:
+        # every slot must be in ``values`` (KeyError otherwise); values must be strings
+        parts = list(self.parts)
+        for i in self._positions:
+            parts[i] = values[parts[i]]
+        return "".join(parts)
+
+    def render_partial(self, values: dict) -> str:
+        # fill the slots found in ``values`` and keep the rest, so the result is a template again
+        out = []
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                out.append(part.replace("{", "{{").replace("}", "}}"))
+            else:
+                out.append(str(values[part]) if part in values else "{" + part + "}")
+        return "".join(out)
+
+
+class EmailTemplate:
+    """Compiled subject and body of one entry in ``EMAIL_TEMPLATES``."""
+
+    def __init__(self, name: str, subject: str, body: str, defaults: Optional[dict] = None, title: str = ""):
+        self.name = name
+        self.title = title or name
+        self.subject = CompiledTemplate(subject)
+        self.body = CompiledTemplate(body)
+        self.defaults = dict(defaults or {})
+        self.slots = self.subject.slots | self.body.slots
+        unknown = set(self.defaults) - self.slots
+        if unknown:
+            raise TemplateError(f"template '{name}' has defaults for unused slots: {', '.join(sorted(unknown))}")
+
+    def fill(self, values: dict) -> dict:
+        # subject and body with ``values`` and the defaults filled in, other slots kept
+        values = {**self.defaults, **values}
+        return {"subject": self.subject.render_partial(values), "body": self.body.render_partial(values)}
+
+
+@lru_cache(maxsize=None)
+def get_template(name: str) -> EmailTemplate:
+    spec = EMAIL_TEMPLATES.get(name)
+    if spec is None:
+        raise TemplateError(f"unknown email template '{name}' (available: {', '.join(EMAIL_TEMPLATES)})")
+    return EmailTemplate(name, spec["subject"], spec["body"], spec.get("defaults"), spec.get("title", ""))
+
+
+def role_emails(role: str, company: str, sender: Optional[dict] = None) -> dict:
+    """Every template for one role, with candidate-level slots left for the merge.
+
+    ``sender`` fills the signature slots (``sender_name``, ``sender_title``).
+    """
+    values = {**(sender or {}), "role": role, "company": company}
+    return {name: get_template(name).fill(values) for name in EMAIL_TEMPLATES}
+
+# ---- candidates ----
+
+def column_name(name: str) -> str:
+    key = re.sub(r"[^0-9a-z]+", "_", str(name).strip().lower()).strip("_")
+    return COLUMN_ALIASES.get(key, key)
+
+
+def open_candidates(path: str) -> tuple:
+    """``(columns, rows)`` for a CSV or JSONL file; rows are read lazily as dicts of strings."""
+    f = open(path, "r", encoding="utf-8-sig", newline="")
+    if path.endswith((".jsonl", ".ndjson")):
+        def records():
+            with f:
+                for line in f:
+                    if line.strip():
+                        yield {column_name(k): v if isinstance(v, str) else ("" if v is None else str(v))
+                               for k, v in json.loads(line).items()}
+        rows = records()
+        first = next(rows, None)
+        if first is None:
+            return [], iter(())
+        return list(first), itertools.chain([first], rows)
+
+    reader = csv.reader(f)
+    header = [column_name(name) for name in next(reader, [])]
+
+    def records():
+        with f:
+            for row in reader:
+                if row:
+                    yield dict(zip(header, row))
+    return header, records()
+
+
+def check_columns(template: EmailTemplate, columns: Iterable[str], constants: dict) -> list:
+    """Slots that no column, ``--set`` value or default can fill."""
+    available = set(columns) | set(constants) | set(template.defaults)
+    return sorted(template.slots - available)
+
+# ---- merge ----
+
+def merge(template: EmailTemplate, candidates: Iterable[dict], constants: Optional[dict] = None,
+          on_missing: str = "skip", stats: Optional[dict] = None) -> Iterator[dict]:
+    """Lazily render ``template`` for each candidate row.
+
+    Row values win over ``constants``, which win over the template defaults; empty cells
+    count as missing. A row still missing a slot is skipped (``on_missing="skip"``,
+    counted in ``stats["missing"]``), raises ``TemplateError`` (``"error"``) or gets an
+    empty string (``"blank"``).
+    """
+    if on_missing not in ON_MISSING:
+        raise ValueError(f"on_missing must be one of {ON_MISSING}")
+    base = {**template.defaults, **(constants or {})}
+    slots = sorted(template.slots)
+    stats = stats if stats is not None else {}
+    stats.setdefault("rendered", 0)
+    stats.setdefault("skipped", 0)
+    stats.setdefault("missing", {})
+    render_subject, render_body = template.subject.render, template.body.render
+
+    for n, row in enumerate(candidates, 1):
+        values = {**base, **{k: v for k, v in row.items() if v}}
+        missing = [slot for slot in slots if slot not in values]
+        if missing:
+            if on_missing == "error":
+                raise TemplateError(f"candidate {n}: no value for {', '.join(missing)}")
+            if on_missing == "skip":
+                stats["skipped"] += 1
+                for slot in missing:
+                    stats["missing"][slot] = stats["missing"].get(slot, 0) + 1
+                continue
+            values.update(dict.fromkeys(missing, ""))
+        stats["rendered"] += 1
+        yield {
+            "id": row.get("id") or str(n),
+            "to": row.get("email", ""),
+            "name": values.get("candidate_name", ""),
+            "template": template.name,
+            "subject": render_subject(values),
+            "body": render_body(values),
+        }
+
+# ---- output ----
+
+def write_jsonl(emails: Iterable[dict], path: str) -> int:
+    encode = json.JSONEncoder(ensure_ascii=False).encode  # one encoder, not one per json.dumps call
+    count = 0
+    with open(path, "w", encoding="utf-8") as out:
+        for email in emails:
+            out.write(encode(email) + "\n")
+            count += 1
+    return count
+
+
+def header_value(text: str) -> str:
+    if text.isascii():
+        return text
+    from email.header import Header
+    return Header(text, "utf-8").encode()
+
+
+def write_eml(emails: Iterable[dict], directory: str, sender: str = "") -> int:
+    """One RFC 5322 ``.eml`` file per email, ready for any mail client or SMTP relay."""
+    import uuid
+    from email.utils import formataddr, formatdate, parseaddr
+
+    os.makedirs(directory, exist_ok=True)
+    date = formatdate(localtime=True)
+    domain = parseaddr(sender)[1].rpartition("@")[2] or "hragent.local"
+    batch = uuid.uuid4().hex[:12]
+    sender_header = f"From: {header_value(sender)}\r\n" if sender else ""
+    count = 0
+    for email in emails:
+        count += 1
+        name = re.sub(r"[^0-9A-Za-z_.-]+", "_", email["id"])[:64]
+        to = formataddr((email["name"], email["to"])) if email["name"] and email["to"] else email["to"]
+        message = (
+            f"{sender_header}To: {to}\r\n"
+            f"Subject: {header_value(email['subject'])}\r\n"
+            f"Date: {date}\r\n"
+            f"Message-ID: <{batch}.{count}@{domain}>\r\n"
+            "MIME-Version: 1.0\r\n"
+            "Content-Type: text/plain; charset=utf-8\r\n"
+            "Content-Transfer-Encoding: 8bit\r\n"
+            "\r\n" + email["body"].replace("\r\n", "\n").replace("\n", "\r\n")
+        )
+        with open(os.path.join(directory, f"{count:06d}-{name}.eml"), "w", encoding="utf-8", newline="") as out:
+            out.write(message)
+    return count
+
+# ---- CLI ----
+
+def parse_assignments(pairs: list) -> dict:
+    values = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"--set expects slot=value, got '{pair}'")
+        values[column_name(key)] = value
+    return values
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render candidate emails from a CSV or JSONL file.")
+    parser.add_argument("candidates", nargs="?", help="candidates .csv or .jsonl (one row per candidate)")
+    parser.add_argument("-t", "--template", default="interview_invite", help="template name (see --list)")
+    parser.add_argument("--set", dest="values", action="append", default=[], metavar="SLOT=VALUE",
+                        help="value for every email, e.g. --set role='Founding Engineer' (repeatable)")
+    parser.add_argument("-o", "--output", help="write emails to this JSONL file")
+    parser.add_argument("--eml-dir", help="write one .eml file per email into this directory")
+    parser.add_argument("--from", dest="sender", default="", help="From header for .eml output")
+    parser.add_argument("--on-missing", choices=ON_MISSING, default="skip",
+                        help="what to do with a candidate that lacks a slot value (default: skip)")
+    parser.add_argument("--list", action="store_true", help="list the templates and their slots")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name in EMAIL_TEMPLATES:
+            template = get_template(name)
+            print(f"{name:<22} {', '.join(sorted(template.slots))}")
+        return 0
+    if not args.candidates or bool(args.output) == bool(args.eml_dir):
+        parser.error("give a candidates file and exactly one of --output / --eml-dir")
+
+    template = get_template(args.template)
+    try:
+        constants = parse_assignments(args.values)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if os.getenv("COMPANY_NAME"):
+        constants.setdefault("company", os.getenv("COMPANY_NAME"))
+    columns, rows = open_candidates(args.candidates)
+    unfillable = check_columns(template, columns, constants)
+    if unfillable and args.on_missing != "blank":
+        parser.error(f"no column or --set value for: {', '.join(unfillable)}")
+
+    started = time.perf_counter()
+    stats = {}
+    emails = merge(template, rows, constants, args.on_missing, stats)
+    if args.output:
+        count = write_jsonl(emails, args.output)
+    else:
+        count = write_eml(emails, args.eml_dir, args.sender)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"✅ {count} emails ({template.name}), {stats['skipped']} skipped in {elapsed:.2f}s "
+        f"({count / elapsed if elapsed else 0:.0f}/s)",
+        file=sys.stderr,
+    )
+    for slot, n in sorted(stats["missing"].items()):
+        print(f"⚠️  {n} candidate(s) without {slot}", file=sys.stderr)
+    return 0 if stats["skipped"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+__all__ = ["CompiledTemplate", "EmailTemplate", "TemplateError", "get_template", "role_emails",
+           "open_candidates", "check_columns", "merge", "write_jsonl", "write_eml"]
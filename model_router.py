@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from llm_client import DEFAULT_MODEL, LLMError, env_number
+
+# ---- configuration ----
+# LLM_ROUTES maps a stage ("jd", "checklist", "combined", or "default" for the rest) to
+# a model or an ordered list of models, e.g.
+#   {"checklist": ["openai/gpt-4o-mini", "openai/gpt-3.5-turbo"], "jd": "openai/gpt-4o"}
+# The first model serves the stage; the others are tried in order when it fails, and
+# the next one also receives hedged duplicates when LLM_HEDGE_PERCENTILE is set.
+DEFAULT_WINDOW = 200        # latencies kept per model for the percentile
+DEFAULT_MIN_SAMPLES = 20    # no hedging until a model has this many samples
+DEFAULT_HEDGE_FLOOR = 0.25  # seconds; never hedge sooner than this
+
+
+def load_routes(raw: Optional[str]) -> dict:
+    if not raw:
+        return {}
+    routes = json.loads(raw)
+    if not isinstance(routes, dict):
+        raise ValueError("LLM_ROUTES must be a JSON object of stage -> model(s)")
+    return {stage: [models] if isinstance(models, str) else list(models) for stage, models in routes.items()}
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per model."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            return len(self._samples.get(model, ()))
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, round(pct / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def summary(self) -> dict:
+        with self._lock:
+            models = list(self._samples)
+        return {
+            model: {
+                "samples": self.count(model),
+                "p50_s": self.percentile(model, 50),
+                "p95_s": self.percentile(model, 95),
+                "p99_s": self.percentile(model, 99),
+            }
+            for model in models
+        }
+
+
+class ModelRouter:
+    """Picks the model chain for each stage and runs calls over it.
+
+    ``acall`` sends the call to the first model. If that model fails, the next one is
+    tried, and so on. With ``hedge_percentile`` set, a call still running after that
+    percentile of the model's recent latency gets a duplicate on the next model, and
+    whichever answers first wins. At most one hedge is sent per call. Every call returns
+    a decision record saying which model answered, what failed, and whether it hedged.
+    """
+
+    def __init__(self, routes: dict = None, hedge_percentile: Optional[float] = None,
+                 min_samples: int = DEFAULT_MIN_SAMPLES, hedge_floor: float = DEFAULT_HEDGE_FLOOR,
+                 window: int = DEFAULT_WINDOW):
+        self.routes = routes or {}
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.hedge_floor = hedge_floor
+        self.latency = LatencyTracker(window)
+
+    def models_for(self, stage: str) -> list:
+        return self.routes.get(stage) or self.routes.get("default") or [DEFAULT_MODEL]
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        if not self.hedge_percentile or self.latency.count(model) < self.min_samples:
+            return None
+        return max(self.hedge_floor, self.latency.percentile(model, self.hedge_percentile))
+
+    async def _timed(self, model: str, call):
+        started = time.perf_counter()
+        result = await call(model)
+        self.latency.record(model, time.perf_counter() - started)
+        return result
+
+    async def acall(self, models: list, call) -> tuple:
+        """Run ``await call(model)`` over ``models``; returns ``(result, decision)``.
+
+        Raises the last model's error when every model in the chain fails.
+        """
+        queue = list(models)
+        running = {}
+        decision = {"route": list(models), "model": None, "failed": [], "hedged": False, "hedge_after_s": None}
+        started = time.perf_counter()
+        error = None
+
+        def launch():
+            model = queue.pop(0)
+            running[asyncio.ensure_future(self._timed(model, call))] = model
+
+        launch()
+        try:
+            while running:
+                timeout = None
+                if queue and len(running) == 1 and not decision["hedged"]:
+                    timeout = self.hedge_delay(next(iter(running.values())))
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # the call is slower than its percentile: race a duplicate on the next model
+                    decision["hedged"], decision["hedge_after_s"] = True, round(timeout, 3)
+                    launch()
+                    continue
+                for task in done:
+                    model = running.pop(task)
+                    try:
+                        result = task.result()
+                    except LLMError as exc:
+                        error = exc
+                        decision["failed"].append({"model": model, "error": f"{type(exc).__name__}: {exc}"})
+                        continue
+                    decision["model"] = model
+                    decision["latency_s"] = round(time.perf_counter() - started, 3)
+                    return result, decision
+                if not running and queue:
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+                if task.done() and not task.cancelled():
+                    task.exception()  # mark as retrieved so asyncio does not log it
+        raise error
+
+    def stats(self) -> dict:
+        return {
+            "routes": self.routes,
+            "hedge_percentile": self.hedge_percentile,
+            "latency": self.latency.summary(),
+        }
+
+# ---- shared instance ----
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_router() -> ModelRouter:
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter(
+                    load_routes(os.getenv("LLM_ROUTES")),
+                    hedge_percentile=env_number("LLM_HEDGE_PERCENTILE", None),
+                    min_samples=env_number("LLM_HEDGE_MIN_SAMPLES", DEFAULT_MIN_SAMPLES, int),
+                )
+    return _router
+
+__all__ = ["ModelRouter", "LatencyTracker", "get_router", "load_routes"]
@@ -0,0 +1,169 @@
+import math
+import re
+import textwrap
+
+# Prompts are built from the per-role clarification answers. Fields the user left empty
+# (or answered "N/A") are dropped instead of being sent as "N/A"/"None" lines, and the
+# text is dedented so no indentation is paid for as tokens.
+
+EMPTY_VALUES = {"", "n/a", "na", "none", "null", "-"}
+
+# words, single punctuation marks and whitespace runs; BPE tokenizers split long words
+# into ~4-character pieces, so this tracks real token counts closely for English prose
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s{2,}")
+
+
+def is_empty(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() in EMPTY_VALUES
+    if isinstance(value, (list, tuple, set, dict)):
+        return not value
+    return False
+
+
+def format_value(value) -> str:
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(v).strip() for v in value if not is_empty(v))
+    return str(value).strip()
+
+
+def field_lines(fields) -> list:
+    # ``fields`` is a list of (label, value); an empty label renders a bare bullet
+    lines = []
+    for label, value in fields:
+        if is_empty(value):
+            continue
+        lines.append(f"- {label}: {format_value(value)}" if label else f"- {format_value(value)}")
+    return lines
+
+
+def section(title: str, intro: str, lines: list) -> str:
+    # a section built only from user data is left out when every field is empty
+    if not lines:
+        return ""
+    return "\n".join([f"**{title}:**", intro, *lines])
+
+
+def compact(text: str) -> str:
+    text = textwrap.dedent(text)
+    text = "\n".join(line.rstrip() for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", text).strip() + "\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough local token count for ``text``, used for budgeting before a call is made."""
+    tokens = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        if piece.isspace() or piece[0].isalnum() or piece[0] == "_":
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+# ---- prompt builders ----
+
+def build_jd_prompt(role: str, info: dict) -> str:
+    timeline = info.get("timeline")
+    equity = " (Equity included)" if info.get("equity") in ["Yes", "Y"] else ""
+    budget = f"{format_value(info['budget'])}{equity}" if not is_empty(info.get("budget")) else None
+    work_setup = info.get("work_setup")
+    location = info.get("location") if not is_empty(info.get("location")) else "Remote"
+
+    parts = [
+        f"Generate a LinkedIn-style job posting for the role: {role}. Use the structure below and incorporate the provided data.",
+        "\n".join([
+            "**About the Job:**",
+            "Introduce the role in the context of a startup. Include the mission, growth stage, and team size if appropriate.",
+            *([f'Mention timeline (e.g., "We\'re looking to fill this role by {format_value(timeline)}").']
+              if not is_empty(timeline) else []),
+        ]),
+        section("What You Will Do", "Write 4–6 bullet points based on:", field_lines([
+            ("", info.get("key_responsibilities")),
+            ("Expected outcomes", info.get("impact_6months")),
+        ])),
+        section("What You Will Bring to the Team", "Include qualifications from:", field_lines([
+            ("Years of experience", info.get("years_experience")),
+            ("Must-have skills", info.get("must_have_skills")),
+            ("Domain experience", info.get("domain_experience")),
+        ])),
+        section("What Gives You an Edge", "Preferred qualifications based on:", field_lines([
+            ("", info.get("nice_to_have_skills")),
+        ])),
+        "\n".join(["**Compensation & Perks:**", *field_lines([
+            ("Compensation", budget),
+            ("Perks", info.get("perks")),
+            ("Work Setup", f"{format_value(work_setup)} at {location}" if not is_empty(work_setup) else location),
+            ("Deadline", info.get("deadline")),
+        ])]),
+        "**Equal Opportunity Statement:**\n"
+        "[Company] is an equal opportunity employer. We make hiring decisions based on qualifications without "
+        "regard to race, religion, national origin, gender, sexual orientation, age, disability, or any other protected status.",
+    ]
+    return compact("\n\n".join(part for part in parts if part))
+
+
+def build_checklist_prompt(role: str, info: dict) -> str:
+    equity = " (Equity)" if info.get("equity") == "Y" else ""
+    timeline = " / ".join(format_value(info[k]) for k in ("timeline", "deadline") if not is_empty(info.get(k)))
+    setup = " @ ".join(format_value(info[k]) for k in ("work_setup", "location") if not is_empty(info.get(k)))
+    data = field_lines([
+        ("Summary", info.get("summary")),
+        ("Budget", f"{format_value(info['budget'])}{equity}" if not is_empty(info.get("budget")) else None),
+        ("Timeline / Deadline", timeline),
+        ("Work Setup", setup),
+        ("Must-Have Skills", info.get("must_have_skills")),
+        ("Nice-to-Have", info.get("nice_to_have_skills")),
+        ("Domain Experience", info.get("domain_experience")),
+        ("Years Exp", info.get("years_experience")),
+        ("Key Responsibilities", info.get("key_responsibilities")),
+        ("Outcomes Expected", info.get("impact_6months")),
+    ])
+    parts = [
+        compact(f"""
+            You're an expert technical recruiter. Generate a step-by-step hiring checklist (8–12 items) for a **{role}** in a startup.
+            Each step should be:
+            - Specific (mention tools or platforms like LinkedIn, HackerRank, etc.)
+            - Actionable (e.g., "Draft JD with clear outcomes", "Schedule 60-min system design interview")
+            - Professional
+            """),
+        "\n".join(["Clarification Data:", *data]) if data else "",
+        "Format: Bullet list, one item per line.\nAvoid generic phrases like \"Hire candidate\".",
+    ]
+    return compact("\n\n".join(part.strip() for part in parts if part))
+
+
+def build_combined_prompt(role: str, info: dict) -> str:
+    parts = [
+        f"You will write two things for the role **{role}** at a startup and return them as one JSON object.",
+        "1. \"jd\": a LinkedIn-style job posting in Markdown, following these instructions:\n"
+        + build_jd_prompt(role, info).strip(),
+        "2. \"checklist\": " + build_checklist_prompt(role, info).strip(),
+        compact("""
+            Respond with JSON only, exactly in this shape (no Markdown fences, no commentary):
+            {"jd": "<job posting markdown>", "checklist": ["<step 1>", "<step 2>", "..."]}
+            The checklist must be a list of 8–12 strings, one step per string, without bullet characters.
+            """),
+    ]
+    return compact("\n\n".join(part.strip() for part in parts))
+
+# ---- token accounting ----
+
+def summarize_usage(records: list) -> dict:
+    """Totals over the per-call usage rows a workflow run recorded in ``token_usage``."""
+    totals = {"calls": 0, "cached_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+              "estimated_prompt_tokens": 0}
+    for row in records:
+        totals["calls"] += 1
+        totals["cached_calls"] += 1 if row.get("cached") else 0
+        totals["prompt_tokens"] += row.get("prompt_tokens") or 0
+        totals["completion_tokens"] += row.get("completion_tokens") or 0
+        totals["estimated_prompt_tokens"] += row.get("estimated_prompt_tokens") or 0
+    totals["total_tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+    return totals
+
+__all__ = [
+    "build_jd_prompt", "build_checklist_prompt", "build_combined_prompt",
+    "compact", "estimate_tokens", "summarize_usage",
+]
@@ -0,0 +1,237 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+DEFAULT_SESSION_PATH = ".hragent_sessions.sqlite"
+
+# Per-role dicts of the workflow state; each role's entry is its own row, so saving
+# one role (or its checklist progress) never rewrites the rest of the plan.
+ROLE_FIELDS = ("clarifications", "fingerprints", "job_descriptions", "checklists",
+               "email_templates", "jd_templates", "errors", "progress")
+# Bulky plan-wide values, kept out of the session row.
+LARGE_FIELDS = ("markdown_output", "token_usage", "routing", "timings")
+# Only read when a caller touches them (see LazySession).
+LAZY_FIELDS = {"job_descriptions", "email_templates", "jd_templates", *LARGE_FIELDS}
+
+
+class LazySession(dict):
+    """A loaded session whose large fields are fetched on first access.
+
+    ``session["job_descriptions"]``, ``.get(...)`` and ``in`` load a lazy field once
+    and keep it; iteration and ``len`` only see the fields loaded so far.
+    """
+
+    def __init__(self, store: "SessionStore", session_id: str, data: dict, lazy: Iterable[str]):
+        super().__init__(data)
+        self.session_id = session_id
+        self._store = store
+        self._lazy = set(lazy)
+
+    def __missing__(self, key):
+        if key not in self._lazy:
+            raise KeyError(key)
+        self._lazy.discard(key)
+        value = self._store.load_field(self.session_id, key)
+        self[key] = value
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._lazy
+
+    def materialize(self) -> dict:
+        # a plain dict with every field loaded
+        for key in list(self._lazy):
+            self[key]
+        return dict(self)
+
+
+class SessionStore:
+    """Saved hiring plans, one per ``session_id`` (a user, browser tab or CLI run).
+
+    Backed by SQLite in WAL mode, so several processes can read while one writes, and
+    every save is a single transaction. The small part of the state lives in one row
+    per session; per-role values (JD, checklist, checklist progress, ...) get a row
+    each and are only rewritten when their value changed.
+    """
+
+    def __init__(self, path: str = DEFAULT_SESSION_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, state TEXT NOT NULL,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_roles ("
+            " session_id TEXT NOT NULL, field TEXT NOT NULL, role TEXT NOT NULL,"
+            " value TEXT NOT NULL, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, field, role))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_fields ("
+            " session_id TEXT NOT NULL, field TEXT NOT NULL,"
+            " value TEXT NOT NULL, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, field))"
+        )
+
+    def _transaction(self, statements: list):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    self._db.execute(sql, params)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    @staticmethod
+    def _upsert_role(session_id: str, field: str, role: str, value, now: float) -> tuple:
+        # the WHERE clause turns an unchanged value into a no-op instead of a page write
+        return (
+            "INSERT INTO session_roles VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (session_id, field, role) DO UPDATE"
+            " SET value = excluded.value, updated_at = excluded.updated_at"
+            " WHERE value != excluded.value",
+            (session_id, field, role, json.dumps(value), now),
+        )
+
+    @staticmethod
+    def _touch(session_id: str, now: float) -> tuple:
+        return (
+            "INSERT INTO sessions VALUES (?, '{}', ?, ?)"
+            " ON CONFLICT (session_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (session_id, now, now),
+        )
+
+    # ---- writes ----
+
+    def save(self, session_id: str, state: dict):
+        """Store a workflow state (a result or just roles + clarifications) atomically.
+
+        Roles no longer in ``state["roles"]`` are dropped, along with their progress.
+        """
+        now = time.time()
+        roles = list(state.get("roles", []))
+        small = {k: v for k, v in state.items() if k not in ROLE_FIELDS and k not in LARGE_FIELDS}
+        statements = [(
+            "INSERT INTO sessions VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (session_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+            (session_id, json.dumps(small), now, now),
+        )]
+        placeholders = ", ".join("?" * len(roles))
+        statements.append((
+            f"DELETE FROM session_roles WHERE session_id = ? AND role NOT IN ({placeholders})",
+            (session_id, *roles),
+        ))
+        for field in ROLE_FIELDS:
+            values = state.get(field)
+            if not isinstance(values, dict):
+                continue
+            for role in roles:
+                if role in values:
+                    statements.append(self._upsert_role(session_id, field, role, values[role], now))
+                else:
+                    statements.append((
+                        "DELETE FROM session_roles WHERE session_id = ? AND field = ? AND role = ?",
+                        (session_id, field, role),
+                    ))
+        for field in LARGE_FIELDS:
+            if field in state:
+                statements.append((
+                    "INSERT OR REPLACE INTO session_fields VALUES (?, ?, ?, ?)",
+                    (session_id, field, json.dumps(state[field]), now),
+                ))
+        self._transaction(statements)
+
+    def save_role(self, session_id: str, role: str, field: str, value):
+        """Update one role's value of a per-role field, e.g. a regenerated JD."""
+        if field not in ROLE_FIELDS:
+            raise ValueError(f"'{field}' is not a per-role field")
+        now = time.time()
+        self._transaction([self._touch(session_id, now), self._upsert_role(session_id, field, role, value, now)])
+
+    def save_progress(self, session_id: str, role: str, checked: list):
+        # checklist progress: the indices of the ticked items
+        self.save_role(session_id, role, "progress", sorted(checked))
+
+    def delete(self, session_id: str):
+        self._transaction([
+            (f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+            for table in ("sessions", "session_roles", "session_fields")
+        ])
+
+    # ---- reads ----
+
+    def load(self, session_id: str) -> Optional[LazySession]:
+        """The saved session, or None. JDs and other large fields load on first use."""
+        with self._lock:
+            row = self._db.execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            eager = [f for f in ROLE_FIELDS if f not in LAZY_FIELDS]
+            rows = self._db.execute(
+                f"SELECT field, role, value FROM session_roles WHERE session_id = ?"
+                f" AND field IN ({', '.join('?' * len(eager))})",
+                (session_id, *eager),
+            ).fetchall()
+        data = json.loads(row[0])
+        for field in eager:
+            data[field] = {}
+        for field, role, value in rows:
+            data[field][role] = json.loads(value)
+        return LazySession(self, session_id, data, LAZY_FIELDS)
+
+    def load_field(self, session_id: str, field: str, roles: Optional[list] = None):
+        """One field of a session; per-role fields can be narrowed to ``roles``."""
+        with self._lock:
+            if field in ROLE_FIELDS:
+                rows = self._db.execute(
+                    "SELECT role, value FROM session_roles WHERE session_id = ? AND field = ?",
+                    (session_id, field),
+                ).fetchall()
+                wanted = None if roles is None else set(roles)
+                return {role: json.loads(value) for role, value in rows if wanted is None or role in wanted}
+            row = self._db.execute(
+                "SELECT value FROM session_fields WHERE session_id = ? AND field = ?", (session_id, field)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_sessions(self) -> list:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT session_id, created_at, updated_at FROM sessions ORDER BY updated_at DESC"
+            ).fetchall()
+        return [{"session_id": sid, "created_at": created, "updated_at": updated} for sid, created, updated in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+# ---- shared instance ----
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_session_store() -> SessionStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore(os.getenv("SESSION_PATH", DEFAULT_SESSION_PATH))
+    return _store
+
+__all__ = ["SessionStore", "LazySession", "get_session_store"]
@@ -0,0 +1,299 @@
+import contextvars
+import json
+import os
+import threading
+import random
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# ---- configuration ----
+# TELEMETRY=off turns spans and metrics into no-ops. TRACE_PATH appends every finished
+# span as one OpenTelemetry-style JSON object per line; METRICS_PATH is rewritten with
+# the Prometheus text exposition after each plan (for a node-exporter textfile collector).
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+METRICS = {
+    # name: (type, help, histogram buckets)
+    "hragent_plan_duration_seconds": ("histogram", "Wall time of a whole workflow run.", TIME_BUCKETS),
+    "hragent_plans_total": ("counter", "Workflow runs by outcome.", None),
+    "hragent_node_duration_seconds": ("histogram", "Wall time of one LangGraph node.", TIME_BUCKETS),
+    "hragent_llm_call_duration_seconds": ("histogram", "Wall time of one logical LLM call (cache, fallbacks and hedges included).", TIME_BUCKETS),
+    "hragent_llm_calls_total": ("counter", "Logical LLM calls by stage and outcome.", None),
+    "hragent_llm_cache_hits_total": ("counter", "LLM calls answered from the response cache.", None),
+    "hragent_llm_requests_total": ("counter", "Requests sent per model (one per logical call per model tried).", None),
+    "hragent_llm_retries_total": ("counter", "HTTP attempts beyond the first, per model.", None),
+    "hragent_llm_queue_wait_seconds": ("histogram", "Time spent waiting on the shared rate limiter.", TIME_BUCKETS),
+    "hragent_llm_tokens_total": ("counter", "Tokens reported by the provider.", None),
+    "hragent_llm_payload_bytes": ("histogram", "Prompt and completion sizes in bytes.", BYTE_BUCKETS),
+}
+
+
+def telemetry_enabled() -> bool:
+    return os.getenv("TELEMETRY", "on").lower() not in ("0", "off", "false", "no")
+
+
+def new_id(length: int) -> str:
+    # random hex ids as in W3C trace context; getrandbits is far cheaper than uuid4
+    return f"{random.getrandbits(length * 4):0{length}x}"
+
+# ---- metrics ----
+
+class Metrics:
+    """In-process counters and histograms rendered in the Prometheus text format."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += value
+            hist[2] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: [list(h[0]), h[1], h[2]] for key, h in self._histograms.items()}
+
+        def fmt(labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            series = [(labels, v) for (n, labels), v in (counters if kind == "counter" else histograms).items() if n == name]
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series, key=lambda s: s[0]):
+                if kind == "counter":
+                    lines.append(f"{name}{fmt(labels)} {value}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(buckets, counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{fmt(labels)} {round(total, 6)}")
+                lines.append(f"{name}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        # write-then-rename so a scraper never reads a half-written file
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+# ---- tracing ----
+
+_current_span = contextvars.ContextVar("hragent_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "_started")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_id(16)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "OK"
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9 if self.end_ns else time.perf_counter() - self._started
+
+    def to_otel(self) -> dict:
+        def value(v):
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": v if isinstance(v, str) else json.dumps(v)}
+
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": value(v)} for k, v in self.attributes.items()],
+            "status": {"code": "STATUS_CODE_ERROR" if self.status == "ERROR" else "STATUS_CODE_OK"},
+        }
+
+
+class NoopSpan:
+    attributes = {}
+    duration = 0.0
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Tracer:
+    """Nested spans tracked through a context variable, so they follow asyncio tasks.
+
+    Spans under a root opened with ``collect=True`` are kept until ``take(trace_id)``
+    (used for the per-plan summary); everything else is only exported.
+    """
+
+    def __init__(self, export_path: Optional[str] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.export_path = export_path
+        self._traces = {}
+        self._export = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, collect: bool = False, **attributes):
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        parent = _current_span.get()
+        span = Span(name, parent.trace_id if parent else new_id(32), parent.span_id if parent else None, attributes)
+        if collect:
+            with self._lock:
+                self._traces[span.trace_id] = []
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.status = "ERROR"
+            span.attributes["error"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = span.start_ns + int((time.perf_counter() - span._started) * 1e9)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is not None:
+                spans.append(span)
+            if self.export_path:
+                if self._export is None:
+                    self._export = open(self.export_path, "a", encoding="utf-8")
+                self._export.write(json.dumps(span.to_otel()) + "\n")
+                if span.parent_id is None:
+                    self._export.flush()
+
+    def take(self, trace_id: str) -> list:
+        with self._lock:
+            return self._traces.pop(trace_id, [])
+
+# ---- plan summary ----
+
+def summarize_trace(spans: list) -> dict:
+    """Per-plan timing summary: total, time per node, and LLM call totals."""
+    root = next((s for s in spans if s.parent_id is None), None)
+    nodes = {}
+    llm = {"calls": 0, "cache_hits": 0, "requests": 0, "retries": 0, "queue_wait_s": 0.0, "call_time_s": 0.0,
+           "prompt_bytes": 0, "completion_bytes": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    by_id = {span.span_id: span for span in spans}
+    slowest = None
+    for span in spans:
+        attrs = span.attributes
+        if span.name == "node":
+            nodes[attrs["node"]] = round(nodes.get(attrs["node"], 0.0) + span.duration, 4)
+        elif span.name == "role":
+            if slowest is None or span.duration > slowest.duration:
+                slowest = span
+        elif span.name == "llm.call":
+            llm["calls"] += 1
+            llm["cache_hits"] += 1 if attrs.get("cached") else 0
+            llm["call_time_s"] += span.duration
+            llm["prompt_bytes"] += attrs.get("prompt_bytes", 0)
+            llm["completion_bytes"] += attrs.get("completion_bytes", 0)
+        elif span.name == "llm.request":
+            llm["requests"] += 1
+            llm["retries"] += max(0, attrs.get("attempts", 1) - 1)
+            llm["queue_wait_s"] += attrs.get("queue_wait_s", 0.0)
+            llm["prompt_tokens"] += attrs.get("prompt_tokens", 0)
+            llm["completion_tokens"] += attrs.get("completion_tokens", 0)
+    llm["queue_wait_s"] = round(llm["queue_wait_s"], 4)
+    llm["call_time_s"] = round(llm["call_time_s"], 4)
+    summary = {
+        "trace_id": root.trace_id if root else None,
+        "total_s": round(root.duration, 4) if root else None,
+        "nodes": nodes,
+        "llm": llm,
+    }
+    if slowest is not None:
+        parent = by_id.get(slowest.parent_id)
+        summary["slowest_role"] = {
+            "role": slowest.attributes["role"],
+            "node": parent.attributes.get("node") if parent is not None else None,
+            "s": round(slowest.duration, 4),
+        }
+    return summary
+
+# ---- shared instances ----
+
+_tracer = None
+_metrics = None
+_telemetry_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        with _telemetry_lock:
+            if _tracer is None:
+                _tracer = Tracer(os.getenv("TRACE_PATH") or None, enabled=telemetry_enabled())
+    return _tracer
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        with _telemetry_lock:
+            if _metrics is None:
+                _metrics = Metrics(enabled=telemetry_enabled())
+    return _metrics
+
+def export_metrics():
+    # refresh the METRICS_PATH textfile, if one is configured
+    path = os.getenv("METRICS_PATH")
+    if path and get_metrics().enabled:
+        get_metrics().write(path)
+
+__all__ = ["Metrics", "Tracer", "Span", "get_tracer", "get_metrics", "export_metrics", "summarize_trace"]
@@ -0,0 +1,57 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_scheduler import parse_deadline  # noqa: E402
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+
+def deadline(text):
+    value = parse_deadline(text, NOW)
+    return None if value is None else datetime.fromtimestamp(value)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2025-09-30", datetime(2025, 9, 30)),
+    ("Nov 15", datetime(2026, 11, 15)),
+    ("Sep 30th", datetime(2027, 9, 30)),          # already passed this year
+    ("15th of November", datetime(2026, 11, 15)),
+    ("Sep 30, 2027", datetime(2027, 9, 30)),
+    ("Hire 2 engineers by Nov 15", datetime(2026, 11, 15)),
+    ("Dec 2025", datetime(2025, 12, 31)),
+    ("December 2025", datetime(2025, 12, 31)),
+    ("by end of Feb 2026", datetime(2026, 2, 28)),
+    ("Q4", datetime(2026, 12, 31)),
+    ("Q1 2027", datetime(2027, 3, 31)),
+])
+def test_dates(text, expected):
+    assert deadline(text) == expected
+
+
+@pytest.mark.parametrize("text, days", [
+    ("in 3 weeks", 21),
+    ("3 weeks from now", 21),
+    ("within 2 months from now", 60),
+    ("10 days", 10),
+])
+def test_relative(text, days):
+    assert (deadline(text) - NOW).days == days
+
+
+@pytest.mark.parametrize("text", ["ASAP", "urgent", "Immediately", "start now"])
+def test_urgent(text):
+    assert deadline(text) == NOW
+
+
+@pytest.mark.parametrize("text", ["not urgent", "no rush", "non-urgent", "marketing 5 hires", "decent 2026", "", None, "TBD"])
+def test_no_deadline(text):
+    assert deadline(text) is None
+
+
+def test_explicit_date_beats_keywords():
+    assert deadline("not urgent, Q2 2027") == datetime(2027, 6, 30)